@@ -8,16 +8,17 @@ AIテキスト分析スタンドアロン版
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import re
+import hashlib
+from collections import Counter
+from functools import lru_cache
+from itertools import chain
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.inspection import permutation_importance
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import classification_report, confusion_matrix
-from sklearn.preprocessing import StandardScaler
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -29,16 +30,40 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# 日本語の自然言語処理用のライブラリ
+# 日本語の自然言語処理用のライブラリ（MeCabベースのfugashiを優先し、Janomeはフォールバック）
 try:
-    import janome
-    from janome.tokenizer import Tokenizer
-    TOKENIZER_TYPE = "janome"
-    tokenizer = Tokenizer()
-    st.sidebar.success("✅ Janome形態素解析エンジン利用可能")
-except ImportError:
-    TOKENIZER_TYPE = "simple"
-    st.sidebar.warning("⚠️ シンプルトークナイザーを使用")
+    import fugashi
+    _tagger = fugashi.Tagger("-Owakati")
+    TOKENIZER_TYPE = "fugashi"
+    st.sidebar.success("✅ fugashi (MeCab) 形態素解析エンジン利用可能")
+except (ImportError, RuntimeError):
+    try:
+        from janome.tokenizer import Tokenizer
+        TOKENIZER_TYPE = "janome"
+        st.sidebar.success("✅ Janome形態素解析エンジン利用可能")
+    except ImportError:
+        TOKENIZER_TYPE = "simple"
+        st.sidebar.warning("⚠️ シンプルトークナイザーを使用")
+
+# 数値KPI列
+KPI_COLUMNS = ['recommend_score', 'overall_satisfaction', 'long_term_intention', 'sense_of_contribution']
+
+# 可視化タブ共通のPlotly設定（ブラウザ側の描画・イベント処理を軽くする）
+PLOTLY_CONFIG = {'staticPlot': False, 'scrollZoom': False, 'displaylogo': False}
+
+# テキストクリーニング用の正規表現
+_RE_PUNCT = re.compile(r'[^\w\s]')
+_RE_WS = re.compile(r'\s+')
+_SIMPLE_TOK = re.compile(r'\w+')
+
+_janome_tokenizer = None
+
+def _get_janome_tokenizer():
+    """Janomeトークナイザーを初回利用時に生成（辞書ロードを起動時に行わない）"""
+    global _janome_tokenizer
+    if _janome_tokenizer is None:
+        _janome_tokenizer = Tokenizer()
+    return _janome_tokenizer
 
 def japanese_tokenizer(text):
     """日本語テキストの形態素解析"""
@@ -49,144 +74,168 @@ def japanese_tokenizer(text):
     if not text:
         return []
     
-    try:
-        if TOKENIZER_TYPE == "janome":
-            tokens = [token.surface for token in tokenizer.tokenize(text, wakati=True)]
-        else:
-            # シンプルな分割（フォールバック）
-            tokens = re.findall(r'\w+', text)
-        
-        # フィルタリング
-        filtered_tokens = []
-        for token in tokens:
-            if len(token) >= 2 and not token.isdigit():
-                filtered_tokens.append(token)
-        
-        return filtered_tokens
-    except Exception:
-        return []
+    return list(_tokenize_cached(text))
+
+@lru_cache(maxsize=8192)
+def _tokenize_cached(text):
+    """形態素解析結果を文字列単位でキャッシュ（同一コメントの再解析を省略）"""
+    if TOKENIZER_TYPE == "fugashi":
+        tokens = _tagger.parse(text).split()
+    elif TOKENIZER_TYPE == "janome":
+        # wakati=True の場合は表層形の文字列がそのまま返る
+        tokens = _get_janome_tokenizer().tokenize(text, wakati=True)
+    else:
+        # シンプルな分割（フォールバック）
+        tokens = _SIMPLE_TOK.findall(text)
+    
+    # フィルタリング
+    return tuple(t for t in tokens if len(t) >= 2 and not t.isdigit())
+
+def _format_comments(rng, templates, keywords1, keywords2, size):
+    """テンプレートとキーワードをまとめて抽選してコメントを生成"""
+    template_idx = rng.integers(0, len(templates), size=size)
+    keyword1_idx = rng.integers(0, len(keywords1), size=size)
+    keyword2_idx = rng.integers(0, len(keywords2), size=size)
+    return [
+        templates[t].format(keyword1=keywords1[k1], keyword2=keywords2[k2])
+        for t, k1, k2 in zip(template_idx, keyword1_idx, keyword2_idx)
+    ]
+
+def count_keywords(comments):
+    """コメント群の単語出現頻度を集計"""
+    counter = Counter()
+    for comment in comments:
+        counter.update(japanese_tokenizer(comment))
+    return counter
 
 @st.cache_data
 def create_enhanced_sample_data(n_samples=200):
     """強化されたサンプルデータを作成"""
-    np.random.seed(42)
-    
-    data = []
+    rng = np.random.default_rng(42)
     
     # 低満足度グループ (下位20% - ラベル1)
     low_satisfaction_samples = int(n_samples * 0.2)
-    for i in range(low_satisfaction_samples):
-        recommend_score = np.random.choice([0, 1, 2, 3, 4, 5, 6], p=[0.1, 0.15, 0.2, 0.25, 0.15, 0.1, 0.05])
-        overall_satisfaction = np.random.choice([1, 2, 3], p=[0.4, 0.4, 0.2])
-        long_term_intention = np.random.choice([1, 2, 3], p=[0.5, 0.3, 0.2])
-        sense_of_contribution = np.random.choice([1, 2, 3], p=[0.4, 0.4, 0.2])
-        
-        # より現実的な不満コメント
-        negative_templates = [
-            "上司との{keyword1}に問題があり、{keyword2}を感じています。改善が必要です。",
-            "{keyword1}の制度に不満があります。特に{keyword2}の点で課題があります。",
-            "職場の{keyword1}が厳しく、{keyword2}に負担を感じています。",
-            "{keyword1}についての期待と現実にギャップがあり、{keyword2}を感じています。",
-            "会社の{keyword1}に関する方針が不明確で、{keyword2}になっています。"
-        ]
-        
-        negative_keywords1 = ["人間関係", "評価制度", "労働環境", "業務量", "キャリアパス", "給与体系", "福利厚生"]
-        negative_keywords2 = ["不安", "ストレス", "不満", "疲労", "困惑", "失望", "心配"]
-        
-        template = np.random.choice(negative_templates)
-        keyword1 = np.random.choice(negative_keywords1)
-        keyword2 = np.random.choice(negative_keywords2)
-        comment = template.format(keyword1=keyword1, keyword2=keyword2)
-        
-        data.append({
-            'recommend_score': recommend_score,
-            'overall_satisfaction': overall_satisfaction,
-            'long_term_intention': long_term_intention,
-            'sense_of_contribution': sense_of_contribution,
-            'comment': comment,
-            'is_low_satisfaction': 1
-        })
+    
+    # より現実的な不満コメント
+    negative_templates = [
+        "上司との{keyword1}に問題があり、{keyword2}を感じています。改善が必要です。",
+        "{keyword1}の制度に不満があります。特に{keyword2}の点で課題があります。",
+        "職場の{keyword1}が厳しく、{keyword2}に負担を感じています。",
+        "{keyword1}についての期待と現実にギャップがあり、{keyword2}を感じています。",
+        "会社の{keyword1}に関する方針が不明確で、{keyword2}になっています。"
+    ]
+    
+    negative_keywords1 = ["人間関係", "評価制度", "労働環境", "業務量", "キャリアパス", "給与体系", "福利厚生"]
+    negative_keywords2 = ["不安", "ストレス", "不満", "疲労", "困惑", "失望", "心配"]
+    
+    low_df = pd.DataFrame({
+        'recommend_score': rng.choice([0, 1, 2, 3, 4, 5, 6], size=low_satisfaction_samples, p=[0.1, 0.15, 0.2, 0.25, 0.15, 0.1, 0.05]),
+        'overall_satisfaction': rng.choice([1, 2, 3], size=low_satisfaction_samples, p=[0.4, 0.4, 0.2]),
+        'long_term_intention': rng.choice([1, 2, 3], size=low_satisfaction_samples, p=[0.5, 0.3, 0.2]),
+        'sense_of_contribution': rng.choice([1, 2, 3], size=low_satisfaction_samples, p=[0.4, 0.4, 0.2]),
+        'comment': _format_comments(rng, negative_templates, negative_keywords1, negative_keywords2, low_satisfaction_samples),
+        'is_low_satisfaction': 1
+    })
     
     # 中・高満足度グループ (上位80% - ラベル0)
     high_satisfaction_samples = n_samples - low_satisfaction_samples
-    for i in range(high_satisfaction_samples):
-        recommend_score = np.random.choice([6, 7, 8, 9, 10], p=[0.1, 0.2, 0.3, 0.25, 0.15])
-        overall_satisfaction = np.random.choice([3, 4, 5], p=[0.3, 0.4, 0.3])
-        long_term_intention = np.random.choice([3, 4, 5], p=[0.3, 0.4, 0.3])
-        sense_of_contribution = np.random.choice([3, 4, 5], p=[0.3, 0.4, 0.3])
-        
-        # より現実的な満足コメント
-        positive_templates = [
-            "{keyword1}に満足しており、{keyword2}を感じています。継続して働きたいです。",
-            "職場の{keyword1}が充実していて、{keyword2}に繋がっています。",
-            "{keyword1}の制度が整っており、{keyword2}を実感しています。",
-            "同僚や上司との{keyword1}が良好で、{keyword2}を感じています。",
-            "会社の{keyword1}に共感でき、{keyword2}を持って働いています。"
-        ]
-        
-        positive_keywords1 = ["成長機会", "チームワーク", "評価制度", "労働環境", "福利厚生", "教育制度", "ビジョン"]
-        positive_keywords2 = ["やりがい", "達成感", "安心感", "満足感", "成長実感", "誇り", "希望"]
-        
-        template = np.random.choice(positive_templates)
-        keyword1 = np.random.choice(positive_keywords1)
-        keyword2 = np.random.choice(positive_keywords2)
-        comment = template.format(keyword1=keyword1, keyword2=keyword2)
-        
-        data.append({
-            'recommend_score': recommend_score,
-            'overall_satisfaction': overall_satisfaction,
-            'long_term_intention': long_term_intention,
-            'sense_of_contribution': sense_of_contribution,
-            'comment': comment,
-            'is_low_satisfaction': 0
-        })
     
-    return pd.DataFrame(data)
+    # より現実的な満足コメント
+    positive_templates = [
+        "{keyword1}に満足しており、{keyword2}を感じています。継続して働きたいです。",
+        "職場の{keyword1}が充実していて、{keyword2}に繋がっています。",
+        "{keyword1}の制度が整っており、{keyword2}を実感しています。",
+        "同僚や上司との{keyword1}が良好で、{keyword2}を感じています。",
+        "会社の{keyword1}に共感でき、{keyword2}を持って働いています。"
+    ]
+    
+    positive_keywords1 = ["成長機会", "チームワーク", "評価制度", "労働環境", "福利厚生", "教育制度", "ビジョン"]
+    positive_keywords2 = ["やりがい", "達成感", "安心感", "満足感", "成長実感", "誇り", "希望"]
+    
+    high_df = pd.DataFrame({
+        'recommend_score': rng.choice([6, 7, 8, 9, 10], size=high_satisfaction_samples, p=[0.1, 0.2, 0.3, 0.25, 0.15]),
+        'overall_satisfaction': rng.choice([3, 4, 5], size=high_satisfaction_samples, p=[0.3, 0.4, 0.3]),
+        'long_term_intention': rng.choice([3, 4, 5], size=high_satisfaction_samples, p=[0.3, 0.4, 0.3]),
+        'sense_of_contribution': rng.choice([3, 4, 5], size=high_satisfaction_samples, p=[0.3, 0.4, 0.3]),
+        'comment': _format_comments(rng, positive_templates, positive_keywords1, positive_keywords2, high_satisfaction_samples),
+        'is_low_satisfaction': 0
+    })
+    
+    return pd.concat([low_df, high_df], ignore_index=True)
+
+def _identity(tokens):
+    """トークン化済み入力をそのまま返す（TfidfVectorizer用）"""
+    return tokens
 
+@st.cache_resource(show_spinner=False)
 def preprocess_text_features(comments):
-    """テキストの前処理と特徴量抽出"""
+    """テキストの前処理と特徴量抽出（TF-IDF行列は疎行列のまま返す）"""
     if len(comments) == 0:
-        return pd.DataFrame(), None
+        return None, None, [], []
     
-    # テキストのクリーニング
-    cleaned_comments = []
-    for comment in comments:
-        if pd.isna(comment):
-            cleaned_comments.append("")
-        else:
-            text = str(comment).strip()
-            text = re.sub(r'[^\w\s]', ' ', text)
-            text = re.sub(r'\s+', ' ', text)
-            cleaned_comments.append(text)
+    # テキストのクリーニング（pandasの文字列演算で一括処理）
+    cleaned = pd.Series(comments).fillna('').astype(str).str.strip()
+    cleaned = cleaned.str.replace(_RE_PUNCT, ' ', regex=True).str.replace(_RE_WS, ' ', regex=True)
+    cleaned_comments = cleaned.str.lower().tolist()
     
     try:
-        # カスタム形態素解析器を使用
-        def custom_tokenizer(text):
-            tokens = japanese_tokenizer(text)
-            return tokens if tokens else ['']
+        # カスタム形態素解析器で一度だけトークン化し、結果をキーワード分析でも再利用する
+        doc_tokens = [japanese_tokenizer(text) or [''] for text in cleaned_comments]
         
         vectorizer = TfidfVectorizer(
-            tokenizer=custom_tokenizer,
+            tokenizer=_identity,
+            preprocessor=_identity,
+            lowercase=False,
+            token_pattern=None,
             max_features=50,  # 特徴量数を調整
+            dtype=np.float32,
             min_df=2,
             max_df=0.8,
             ngram_range=(1, 2)
         )
         
-        tfidf_matrix = vectorizer.fit_transform(cleaned_comments)
-        feature_names = vectorizer.get_feature_names_out()
-        
-        tfidf_df = pd.DataFrame(
-            tfidf_matrix.toarray(),
-            columns=[f"word_{name}" for name in feature_names]
-        )
+        tfidf_matrix = vectorizer.fit_transform(doc_tokens)
+        feature_names = [f"word_{name}" for name in vectorizer.get_feature_names_out()]
         
-        return tfidf_df, vectorizer
+        return tfidf_matrix, vectorizer, feature_names, doc_tokens
         
     except Exception as e:
         st.error(f"テキスト特徴量抽出エラー: {e}")
-        return pd.DataFrame(), None
+        return None, None, [], []
 
+def _fit_and_score(model, X_train, X_test, y_train, y_test):
+    """単一モデルの訓練と評価"""
+    try:
+        # HistGradientBoostingは疎行列を受け付けないため、このモデルのみ密行列に変換
+        if isinstance(model, HistGradientBoostingClassifier) and sparse.issparse(X_train):
+            X_train, X_test = X_train.toarray(), X_test.toarray()
+        
+        model.fit(X_train, y_train)
+        cv_scores = cross_val_score(model, X_train, y_train, cv=3, scoring='accuracy', n_jobs=-1)
+        scores = {
+            'cv_mean': cv_scores.mean(),
+            'cv_std': cv_scores.std(),
+            'test_score': model.score(X_test, y_test),
+            'train_score': model.score(X_train, y_train)
+        }
+        
+        # feature_importances_ を持たないモデルは順列重要度で代替
+        if not hasattr(model, 'feature_importances_'):
+            result = permutation_importance(model, X_test, y_test, n_repeats=5, random_state=42)
+            model.permutation_importances_ = result.importances_mean
+        
+        return model, scores, None
+    except Exception as e:
+        return None, None, e
+
+def _hash_sparse_matrix(X):
+    """疎行列のキャッシュキー（内容のハッシュ値）"""
+    digest = hashlib.md5()
+    for array in (X.data, X.indices, X.indptr):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return (X.shape, digest.hexdigest())
+
+@st.cache_resource(show_spinner=False, hash_funcs={sparse.csr_matrix: _hash_sparse_matrix})
 def train_ensemble_models(X, y):
     """アンサンブル学習モデルの訓練"""
     X_train, X_test, y_train, y_test = train_test_split(
@@ -195,67 +244,84 @@ def train_ensemble_models(X, y):
     
     models = {
         'Decision Tree': DecisionTreeClassifier(random_state=42, max_depth=8),
-        'Random Forest': RandomForestClassifier(n_estimators=50, random_state=42, max_depth=8),
-        'Gradient Boosting': GradientBoostingClassifier(n_estimators=50, random_state=42, max_depth=5)
+        'Random Forest': RandomForestClassifier(n_estimators=50, random_state=42, max_depth=8, n_jobs=-1),
+        'Gradient Boosting': HistGradientBoostingClassifier(max_iter=50, max_depth=5, random_state=42)
     }
     
     trained_models = {}
     model_scores = {}
     
+    # 並列化はランダムフォレストと交差検証のn_jobsのみとし、モデル単位の並列化は重ねない
+    # （プロセスプールを入れ子にするとCPUを奪い合い、逐次実行より遅くなる）
     for name, model in models.items():
-        try:
-            model.fit(X_train, y_train)
-            cv_scores = cross_val_score(model, X_train, y_train, cv=3, scoring='accuracy')
-            test_score = model.score(X_test, y_test)
-            
-            trained_models[name] = model
-            model_scores[name] = {
-                'cv_mean': cv_scores.mean(),
-                'cv_std': cv_scores.std(),
-                'test_score': test_score,
-                'train_score': model.score(X_train, y_train)
-            }
-        except Exception as e:
-            st.warning(f"{name}の訓練でエラー: {e}")
+        model, scores, error = _fit_and_score(model, X_train, X_test, y_train, y_test)
+        if error is not None:
+            st.warning(f"{name}の訓練でエラー: {error}")
+            continue
+        trained_models[name] = model
+        model_scores[name] = scores
     
     return trained_models, model_scores, X_test, y_test
 
+def get_feature_importances(model):
+    """モデルの特徴量重要性を取得（未対応モデルは順列重要度を使用）"""
+    if hasattr(model, 'feature_importances_'):
+        return model.feature_importances_
+    return getattr(model, 'permutation_importances_', None)
+
+def top_n_indices(importances, top_n):
+    """重要度上位N件のインデックスを降順で取得（全体ソートを避ける）"""
+    k = min(top_n, len(importances))
+    if k < len(importances):
+        candidates = np.argpartition(-importances, k)[:k]
+    else:
+        candidates = np.arange(len(importances))
+    return candidates[np.argsort(-importances[candidates])]
+
 def visualize_feature_importance(models, feature_names, top_n=15):
-    """特徴量重要性の可視化"""
-    fig = make_subplots(
-        rows=len(models), cols=1,
-        subplot_titles=[f"{name} - Top {top_n} Important Features" for name in models.keys()],
-        vertical_spacing=0.15
+    """特徴量重要性の可視化（モデルごとのファセットを1つの図にまとめる）"""
+    import plotly.express as px
+    import plotly.graph_objects as go
+    
+    frames = []
+    for model_name, model in models.items():
+        importances = get_feature_importances(model)
+        if importances is not None:
+            indices = top_n_indices(importances, top_n)
+            frames.append(pd.DataFrame({
+                'model': model_name,
+                'feature': [feature_names[idx].replace('word_', '') for idx in indices],
+                'importance': importances[indices]
+            }))
+    
+    if not frames:
+        return go.Figure()
+    
+    # 横棒グラフは下から描画されるため、重要度の低い順に並べる
+    long_df = pd.concat(frames, ignore_index=True).iloc[::-1]
+    
+    fig = px.bar(
+        long_df, x='importance', y='feature', color='model',
+        facet_row='model', orientation='h',
+        category_orders={'model': list(models.keys())},
+        color_discrete_sequence=px.colors.qualitative.Set3,
+        labels={'importance': '重要性スコア', 'feature': ''}
     )
     
-    for i, (model_name, model) in enumerate(models.items(), 1):
-        if hasattr(model, 'feature_importances_'):
-            importances = model.feature_importances_
-            indices = np.argsort(importances)[::-1][:top_n]
-            top_features = [feature_names[idx].replace('word_', '') for idx in indices]
-            top_importances = importances[indices]
-            
-            fig.add_trace(
-                go.Bar(
-                    y=top_features[::-1],
-                    x=top_importances[::-1],
-                    orientation='h',
-                    name=model_name,
-                    showlegend=False,
-                    marker_color=px.colors.qualitative.Set3[i-1]
-                ),
-                row=i, col=1
-            )
+    # モデルごとに上位特徴量が異なるため、y軸は共有しない
+    fig.update_yaxes(matches=None, showticklabels=True)
+    fig.for_each_annotation(
+        lambda a: a.update(text=f"{a.text.split('=')[-1]} - Top {top_n} Important Features")
+    )
     
     fig.update_layout(
-        height=250 * len(models),
+        height=250 * len(frames),
         title="🎯 特徴量重要性ランキング（どの単語が低満足度を予測するか）",
         title_font_size=18,
-        title_x=0.5
+        title_x=0.5,
+        showlegend=False
     )
     
-    fig.update_xaxes(title_text="重要性スコア")
-    
     return fig
 
 def create_prediction_summary(models, model_scores):
@@ -274,6 +340,8 @@ def create_prediction_summary(models, model_scores):
     return pd.DataFrame(summary_data)
 
 def main():
+    import plotly.express as px
+    
     # メインヘッダー
     st.markdown("""
     <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
@@ -308,12 +376,12 @@ def main():
         st.markdown("---")
         st.markdown("### 🎯 技術仕様")
         st.code("""
-        • 形態素解析: Janome
+        • 形態素解析: fugashi (MeCab) / Janome
         • 特徴量抽出: TF-IDF
         • アルゴリズム: 
           - Decision Tree
           - Random Forest  
-          - Gradient Boosting
+          - Gradient Boosting (Histogram)
         • 評価: Cross Validation
         """)
     
@@ -326,20 +394,20 @@ def main():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        low_count = df['is_low_satisfaction'].sum()
+        low_count = int(df['is_low_satisfaction'].to_numpy().sum())
         st.metric("💡 改善対象者数", f"{low_count}人", 
                  f"{low_count/len(df)*100:.1f}%")
     
     with col2:
-        avg_recommend = df['recommend_score'].mean()
+        avg_recommend = float(df['recommend_score'].to_numpy().mean())
         st.metric("📈 平均推奨スコア", f"{avg_recommend:.1f}")
     
     with col3:
-        avg_satisfaction = df['overall_satisfaction'].mean()
+        avg_satisfaction = float(df['overall_satisfaction'].to_numpy().mean())
         st.metric("😊 平均満足度", f"{avg_satisfaction:.1f}/5")
     
     with col4:
-        unique_words = len(set(' '.join(df['comment']).split()))
+        unique_words = df['comment'].str.split().explode().nunique()
         st.metric("📝 ユニーク単語数", f"{unique_words:,}")
     
     # タブ設定
@@ -365,7 +433,7 @@ def main():
                 barmode='overlay'
             )
             fig1.update_layout(height=400)
-            st.plotly_chart(fig1, use_container_width=True)
+            st.plotly_chart(fig1, use_container_width=True, config=PLOTLY_CONFIG)
         
         with col2:
             # 推奨スコア分布
@@ -377,11 +445,14 @@ def main():
                 barmode='overlay'
             )
             fig2.update_layout(height=400)
-            st.plotly_chart(fig2, use_container_width=True)
+            st.plotly_chart(fig2, use_container_width=True, config=PLOTLY_CONFIG)
         
         # 相関分析
         st.markdown("### 🔗 KPI間の相関関係")
-        corr_data = df[['recommend_score', 'overall_satisfaction', 'long_term_intention', 'sense_of_contribution']].corr()
+        corr_data = pd.DataFrame(
+            np.corrcoef(df[KPI_COLUMNS].to_numpy(), rowvar=False),
+            index=KPI_COLUMNS, columns=KPI_COLUMNS
+        )
         
         fig3 = px.imshow(
             corr_data,
@@ -390,7 +461,7 @@ def main():
             zmin=-1, zmax=1
         )
         fig3.update_layout(height=400)
-        st.plotly_chart(fig3, use_container_width=True)
+        st.plotly_chart(fig3, use_container_width=True, config=PLOTLY_CONFIG)
         
         # サンプルコメント
         st.markdown("### 💬 コメントサンプル")
@@ -411,15 +482,19 @@ def main():
             progress_bar.progress(33)
             
             with st.spinner("形態素解析とTF-IDF特徴量抽出中..."):
-                text_features, vectorizer = preprocess_text_features(df['comment'])
+                text_features, vectorizer, text_feature_names, doc_tokens = preprocess_text_features(df['comment'])
                 
-                if len(text_features.columns) > 0:
+                if len(text_feature_names) > 0:
                     # ステップ2: 特徴量結合
                     status_text.text("ステップ 2/3: 特徴量結合中...")
                     progress_bar.progress(66)
                     
-                    numeric_features = df[['recommend_score', 'overall_satisfaction', 'long_term_intention', 'sense_of_contribution']]
-                    X = pd.concat([numeric_features, text_features], axis=1)
+                    numeric_columns = list(KPI_COLUMNS)
+                    X = sparse.hstack([
+                        sparse.csr_matrix(df[numeric_columns].to_numpy(dtype=np.float32)),
+                        text_features
+                    ], dtype=np.float32).tocsr()
+                    feature_names = numeric_columns + text_feature_names
                     y = df['is_low_satisfaction']
                     
                     st.success(f"✅ 特徴量準備完了: {X.shape[1]}個の特徴量")
@@ -434,8 +509,9 @@ def main():
                         # セッションステートに保存
                         st.session_state['ml_models'] = models
                         st.session_state['ml_scores'] = scores
-                        st.session_state['ml_feature_names'] = X.columns.tolist()
+                        st.session_state['ml_feature_names'] = feature_names
                         st.session_state['ml_vectorizer'] = vectorizer
+                        st.session_state['ml_tokens'] = doc_tokens
                         st.session_state['ml_X'] = X
                         st.session_state['ml_y'] = y
                         
@@ -483,9 +559,9 @@ def main():
             
             if selected_model in models:
                 model = models[selected_model]
-                if hasattr(model, 'feature_importances_'):
-                    importances = model.feature_importances_
-                    indices = np.argsort(importances)[::-1][:15]
+                importances = get_feature_importances(model)
+                if importances is not None:
+                    indices = top_n_indices(importances, 15)
                     
                     detailed_data = []
                     for i, idx in enumerate(indices):
@@ -540,57 +616,64 @@ def main():
         st.markdown("### 💭 コメント分析とインサイト")
         
         # コメント長分析
-        df['comment_length'] = df['comment'].str.len()
+        length_df = pd.DataFrame({
+            'comment_length': df['comment'].str.len(),
+            'is_low_satisfaction': df['is_low_satisfaction']
+        })
         
         col1, col2 = st.columns(2)
         
         with col1:
             fig_length = px.histogram(
-                df, x='comment_length', color='is_low_satisfaction',
+                length_df, x='comment_length', color='is_low_satisfaction',
                 title="コメント文字数分布",
                 labels={'comment_length': '文字数', 'is_low_satisfaction': '改善対象'},
                 color_discrete_map={0: '#2E86AB', 1: '#F24236'}
             )
-            st.plotly_chart(fig_length, use_container_width=True)
+            st.plotly_chart(fig_length, use_container_width=True, config=PLOTLY_CONFIG)
         
         with col2:
             # 感情分析風の可視化
-            sentiment_data = []
-            for idx, row in df.iterrows():
-                positive_words = ['満足', '良い', '素晴らしい', '充実', '成長', 'やりがい', '達成']
-                negative_words = ['不満', '問題', '課題', '厳しい', '大変', '困難', 'ストレス']
-                
-                pos_count = sum(1 for word in positive_words if word in row['comment'])
-                neg_count = sum(1 for word in negative_words if word in row['comment'])
-                sentiment_score = pos_count - neg_count
-                
-                sentiment_data.append({
-                    'sentiment_score': sentiment_score,
-                    'is_low_satisfaction': row['is_low_satisfaction']
-                })
+            positive_words = ['満足', '良い', '素晴らしい', '充実', '成長', 'やりがい', '達成']
+            negative_words = ['不満', '問題', '課題', '厳しい', '大変', '困難', 'ストレス']
+            pos_pattern = '|'.join(map(re.escape, positive_words))
+            neg_pattern = '|'.join(map(re.escape, negative_words))
+            
+            pos_count = df['comment'].str.count(pos_pattern)
+            neg_count = df['comment'].str.count(neg_pattern)
             
-            sentiment_df = pd.DataFrame(sentiment_data)
+            sentiment_df = pd.DataFrame({
+                'sentiment_score': pos_count - neg_count,
+                'is_low_satisfaction': df['is_low_satisfaction']
+            })
             fig_sentiment = px.histogram(
                 sentiment_df, x='sentiment_score', color='is_low_satisfaction',
                 title="感情スコア分布（正-負単語バランス）",
                 labels={'sentiment_score': '感情スコア', 'is_low_satisfaction': '改善対象'},
                 color_discrete_map={0: '#2E86AB', 1: '#F24236'}
             )
-            st.plotly_chart(fig_sentiment, use_container_width=True)
+            st.plotly_chart(fig_sentiment, use_container_width=True, config=PLOTLY_CONFIG)
         
         # キーワード分析
         st.markdown("### 🔍 頻出キーワード分析")
         
-        # 低満足度グループのキーワード
-        low_comments = df[df['is_low_satisfaction'] == 1]['comment'].str.cat(sep=' ')
-        high_comments = df[df['is_low_satisfaction'] == 0]['comment'].str.cat(sep=' ')
+        # グループ別のキーワード（機械学習タブのトークン化結果があれば再利用）
+        doc_tokens = st.session_state.get('ml_tokens')
+        if doc_tokens is not None and len(doc_tokens) == len(df):
+            is_low = df['is_low_satisfaction'].to_numpy() == 1
+            low_counter = Counter(chain.from_iterable(t for t, low in zip(doc_tokens, is_low) if low))
+            high_counter = Counter(chain.from_iterable(t for t, low in zip(doc_tokens, is_low) if not low))
+            low_counter.pop('', None)
+            high_counter.pop('', None)
+        else:
+            low_counter = count_keywords(df.loc[df['is_low_satisfaction'] == 1, 'comment'])
+            high_counter = count_keywords(df.loc[df['is_low_satisfaction'] == 0, 'comment'])
         
         col1, col2 = st.columns(2)
         
         with col1:
             st.markdown("#### ⚠️ 改善対象者のキーワード")
-            low_words = japanese_tokenizer(low_comments)
-            low_word_freq = pd.Series(low_words).value_counts().head(10)
+            low_word_freq = pd.Series(dict(low_counter.most_common(10)))
             
             fig_low = px.bar(
                 x=low_word_freq.values,
@@ -600,12 +683,11 @@ def main():
                 color_discrete_sequence=['#F24236']
             )
             fig_low.update_layout(height=400)
-            st.plotly_chart(fig_low, use_container_width=True)
+            st.plotly_chart(fig_low, use_container_width=True, config=PLOTLY_CONFIG)
         
         with col2:
             st.markdown("#### ✅ 満足者のキーワード")
-            high_words = japanese_tokenizer(high_comments)
-            high_word_freq = pd.Series(high_words).value_counts().head(10)
+            high_word_freq = pd.Series(dict(high_counter.most_common(10)))
             
             fig_high = px.bar(
                 x=high_word_freq.values,
@@ -615,7 +697,7 @@ def main():
                 color_discrete_sequence=['#2E86AB']
             )
             fig_high.update_layout(height=400)
-            st.plotly_chart(fig_high, use_container_width=True)
+            st.plotly_chart(fig_high, use_container_width=True, config=PLOTLY_CONFIG)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -6,6 +6,14 @@
 
 import pandas as pd
 import os
+from openpyxl import load_workbook
+
+RECOMMENDATION_KEYWORDS = ['推奨', '親しい友人', '家族', '転職', '就職', 'recommend', 'nps']
+SATISFACTION_KEYWORDS = ['満足', '評価', '度合い']
+
+def _column_names(header_values):
+    """ヘッダー行の値から列名を生成（空欄はpandasと同様にUnnamedとする）"""
+    return [v if v is not None else f"Unnamed: {i}" for i, v in enumerate(header_values)]
 
 def check_excel_data():
     """Excelファイルの構造を確認"""
@@ -16,76 +24,95 @@ def check_excel_data():
         return
     
     try:
-        # Excelファイルの全シートを確認
-        excel_file = pd.ExcelFile(excel_path)
-        print(f"✅ Excelファイルを読み込みました: {excel_path}")
-        print(f"📊 シート数: {len(excel_file.sheet_names)}")
-        print(f"📋 シート名: {excel_file.sheet_names}")
-        
-        for sheet_name in excel_file.sheet_names:
-            print(f"\n=== シート: {sheet_name} ===")
-            try:
-                # まず最初の数行を確認
-                print("\n--- 最初の5行を確認 ---")
-                df_preview = pd.read_excel(excel_path, sheet_name=sheet_name, nrows=5)
-                print(df_preview)
-                
-                # ヘッダーが1行目にない可能性があるので、複数のheader位置を試す
-                for header_row in [0, 1, 2]:
-                    try:
-                        print(f"\n--- header={header_row}で読み込み ---")
-                        df = pd.read_excel(excel_path, sheet_name=sheet_name, header=header_row)
-                        print(f"データ形状: {df.shape}")
-                        print(f"列数: {len(df.columns)}")
-                        
-                        # 最初の数列だけ表示
-                        print("\n最初の10列の列名:")
-                        for i, col in enumerate(df.columns[:10], 1):
-                            print(f"{i:2d}. {col}")
-                        
-                        if len(df.columns) > 10:
-                            print(f"... その他 {len(df.columns) - 10} 列")
-                        
-                        # 推奨度関連の列を検索
-                        print("\n🔍 推奨度関連の列:")
-                        recommendation_cols = []
-                        for col in df.columns:
-                            col_str = str(col).lower()
-                            if any(keyword in col_str for keyword in ['推奨', '親しい友人', '家族', '転職', '就職', 'recommend', 'nps']):
-                                recommendation_cols.append(col)
-                                print(f"  ✓ {col}")
-                        
-                        # 満足度関連の列を検索
-                        print("\n🔍 満足度関連の列:")
-                        satisfaction_cols = []
-                        for col in df.columns:
-                            col_str = str(col).lower()
-                            if any(keyword in col_str for keyword in ['満足', '評価', '度合い']):
-                                satisfaction_cols.append(col)
-                                print(f"  ✓ {col}")
-                        
-                        if len(satisfaction_cols) > 10:
-                            print(f"  ... その他 {len(satisfaction_cols) - 10} 列")
-                        
-                        # 有効な列が見つかった場合は詳細情報を表示
-                        if recommendation_cols:
-                            print(f"\n📊 推奨度関連データのサンプル:")
-                            for col in recommendation_cols[:2]:  # 最初の2列のサンプル
-                                print(f"\n--- {col} ---")
-                                print(df[col].value_counts().head())
-                                print(f"データ型: {df[col].dtype}")
-                                print(f"欠損値: {df[col].isnull().sum()}")
-                        
-                        if recommendation_cols or satisfaction_cols:
-                            print(f"\n✅ header={header_row}で有効なデータが見つかりました")
+        # ワークブックは読み取り専用モードで一度だけ開く
+        workbook = load_workbook(excel_path, read_only=True, data_only=True)
+        try:
+            print(f"✅ Excelファイルを読み込みました: {excel_path}")
+            print(f"📊 シート数: {len(workbook.sheetnames)}")
+            print(f"📋 シート名: {workbook.sheetnames}")
+            
+            for sheet_name in workbook.sheetnames:
+                print(f"\n=== シート: {sheet_name} ===")
+                try:
+                    worksheet = workbook[sheet_name]
+                    
+                    # 先頭行だけをストリーミングで読み込み、ヘッダー位置の判定はメモリ上で行う
+                    head_rows = [list(row) for row in worksheet.iter_rows(max_row=6, values_only=True)]
+                    total_rows = worksheet.max_row
+                    
+                    if not head_rows:
+                        print("  ⚠️ データがありません")
+                        continue
+                    
+                    # まず最初の数行を確認
+                    print("\n--- 最初の5行を確認 ---")
+                    df_preview = pd.DataFrame(head_rows[1:6], columns=_column_names(head_rows[0]))
+                    print(df_preview)
+                    
+                    # ヘッダーが1行目にない可能性があるので、複数のheader位置を試す
+                    for header_row in [0, 1, 2]:
+                        if header_row >= len(head_rows):
                             break
+                        
+                        try:
+                            print(f"\n--- header={header_row}で読み込み ---")
+                            columns = _column_names(head_rows[header_row])
+                            n_rows = total_rows - header_row - 1 if total_rows else "不明"
+                            print(f"データ形状: ({n_rows}, {len(columns)})")
+                            print(f"列数: {len(columns)}")
                             
-                    except Exception as e:
-                        print(f"  ❌ header={header_row}でエラー: {e}")
-                        continue
-                
-            except Exception as e:
-                print(f"❌ シート {sheet_name} の読み込みエラー: {e}")
+                            # 最初の数列だけ表示
+                            print("\n最初の10列の列名:")
+                            for i, col in enumerate(columns[:10], 1):
+                                print(f"{i:2d}. {col}")
+                            
+                            if len(columns) > 10:
+                                print(f"... その他 {len(columns) - 10} 列")
+                            
+                            # 推奨度関連の列を検索
+                            print("\n🔍 推奨度関連の列:")
+                            recommendation_cols = []
+                            for idx, col in enumerate(columns):
+                                col_str = str(col).lower()
+                                if any(keyword in col_str for keyword in RECOMMENDATION_KEYWORDS):
+                                    recommendation_cols.append(idx)
+                                    print(f"  ✓ {col}")
+                            
+                            # 満足度関連の列を検索
+                            print("\n🔍 満足度関連の列:")
+                            satisfaction_cols = []
+                            for col in columns:
+                                col_str = str(col).lower()
+                                if any(keyword in col_str for keyword in SATISFACTION_KEYWORDS):
+                                    satisfaction_cols.append(col)
+                                    print(f"  ✓ {col}")
+                            
+                            if len(satisfaction_cols) > 10:
+                                print(f"  ... その他 {len(satisfaction_cols) - 10} 列")
+                            
+                            # 有効な列が見つかった場合のみ、サンプル行を読み込んで詳細情報を表示
+                            if recommendation_cols:
+                                df = pd.read_excel(excel_path, sheet_name=sheet_name, header=header_row, nrows=200)
+                                print(f"\n📊 推奨度関連データのサンプル:")
+                                for idx in recommendation_cols[:2]:  # 最初の2列のサンプル
+                                    series = df.iloc[:, idx]
+                                    print(f"\n--- {columns[idx]} ---")
+                                    print(series.value_counts().head())
+                                    print(f"データ型: {series.dtype}")
+                                    print(f"欠損値: {series.isnull().sum()}")
+                            
+                            if recommendation_cols or satisfaction_cols:
+                                print(f"\n✅ header={header_row}で有効なデータが見つかりました")
+                                break
+                                
+                        except Exception as e:
+                            print(f"  ❌ header={header_row}でエラー: {e}")
+                            continue
+                    
+                except Exception as e:
+                    print(f"❌ シート {sheet_name} の読み込みエラー: {e}")
+        finally:
+            workbook.close()
         
     except Exception as e:
         print(f"❌ ファイル読み込みエラー: {e}")
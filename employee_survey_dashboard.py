@@ -6,16 +6,25 @@
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
 from datetime import datetime
 import os
+import glob
+import hashlib
 import re
+import functools
+import threading
+import time
 from collections import Counter
+from itertools import combinations
 from janome.tokenizer import Tokenizer
+# MeCabベースのfugashiが利用可能な場合は形態素解析に優先して使う（Janomeはフォールバック）
+try:
+    import fugashi
+    FUGASHI_AVAILABLE = True
+except ImportError:
+    FUGASHI_AVAILABLE = False
 import networkx as nx
-from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import StandardScaler
 from sklearn.decomposition import PCA
@@ -27,6 +36,22 @@ try:
     STATSMODELS_AVAILABLE = True
 except ImportError:
     STATSMODELS_AVAILABLE = False
+try:
+    import python_calamine
+    EXCEL_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_ENGINE = 'openpyxl'
+try:
+    import polars as pl
+    import fastexcel  # polars.read_excel のバックエンド
+    POLARS_AVAILABLE = True
+except ImportError:
+    POLARS_AVAILABLE = False
+try:
+    from st_aggrid import AgGrid, GridUpdateMode
+    AGGRID_AVAILABLE = True
+except ImportError:
+    AGGRID_AVAILABLE = False
 from scipy import stats
 from scipy.stats import probplot
 from wordcloud import WordCloud
@@ -43,178 +68,174 @@ st.set_page_config(
     layout="wide",
 )
 
-# カスタムCSS
-st.markdown("""
-<style>
-    html, body, [class*="css"] {
-        font-family: 'Helvetica', 'Arial', 'Hiragino Sans', 'Yu Gothic', sans-serif;
-        background-color: #f8fafc;
-    }
-    
-    h1, h2, h3 {
-        color: #1E293B;
-    }
-    
-    /* 改良されたKPIカードスタイル */
-    .kpi-card {
-        background: linear-gradient(135deg, #ffffff 0%, #f8fafc 100%);
-        border-radius: 16px;
-        padding: 24px 20px;
-        box-shadow: 0 4px 20px rgba(0, 0, 0, 0.08);
-        border: 1px solid rgba(255, 255, 255, 0.2);
-        margin-bottom: 16px;
-        min-height: 140px;
-        display: flex;
-        flex-direction: column;
-        justify-content: space-between;
-        position: relative;
-        overflow: hidden;
-        transition: all 0.3s ease;
-    }
-    
-    .kpi-card:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 8px 25px rgba(0, 0, 0, 0.12);
-    }
-    
-    .kpi-card::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        height: 4px;
-        background: linear-gradient(90deg, #667eea, #764ba2);
-    }
-    
-    .kpi-title {
-        font-size: 13px;
-        color: #64748b;
-        margin-bottom: 12px;
-        font-weight: 600;
-        text-transform: uppercase;
-        letter-spacing: 0.5px;
-        line-height: 1.2;
-    }
-    
-    .kpi-value {
-        font-size: 32px;
-        font-weight: 800;
-        color: #1e293b;
-        margin-bottom: 8px;
-        line-height: 1.1;
-        display: flex;
-        align-items: baseline;
-    }
-    
-    .kpi-unit {
-        font-size: 18px;
-        font-weight: 500;
-        color: #64748b;
-        margin-left: 4px;
-    }
-    
-    .kpi-change {
-        font-size: 13px;
-        display: flex;
-        align-items: center;
-        color: #64748b;
-        font-weight: 500;
-    }
-    
-    .kpi-icon {
-        margin-right: 8px;
-        font-size: 20px;
-        filter: drop-shadow(0 2px 4px rgba(0,0,0,0.1));
-    }
-    
-    /* カラー付きKPIカード */
-    .kpi-card-green::before {
-        background: linear-gradient(90deg, #22c55e, #16a34a);
-    }
-    .kpi-card-orange::before {
-        background: linear-gradient(90deg, #f59e0b, #d97706);
-    }
-    .kpi-card-red::before {
-        background: linear-gradient(90deg, #ef4444, #dc2626);
-    }
-    .kpi-card-blue::before {
-        background: linear-gradient(90deg, #3b82f6, #2563eb);
-    }
-    
-    /* セクションヘッダー改善 */
-    .section-header {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        padding: 20px 28px;
-        border-radius: 16px;
-        margin-bottom: 32px;
-        box-shadow: 0 8px 32px rgba(102, 126, 234, 0.25);
-        border: 1px solid rgba(255, 255, 255, 0.1);
-    }
+# カスタムCSS（assets/styles.css から一度だけ読み込む）
+CSS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'styles.css')
+
+@st.cache_data
+def _load_css():
+    """カスタムCSSを読み込み、コメントと余分な空白を除いて再実行ごとの送信量を減らす"""
+    with open(CSS_PATH, encoding='utf-8') as f:
+        css = f.read()
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{};])\s*', r'\1', css).strip()
+
+st.markdown(f"<style>{_load_css()}</style>", unsafe_allow_html=True)
+
+# 回答者ごとの点を描く散布図の描画モード（SVGは点数が増えると重くなるためWebGLで描画）
+# 点数の少ないグラフはSVGのままとし、ブラウザのWebGLコンテキスト数の上限に達しないようにする
+PLOTLY_RENDER = 'webgl'
+
+def _resampled(fig):
+    """plotly-resamplerが利用可能な場合、x軸が連番の点数の多い図をFigureResamplerで包んで表示点数を間引く
+    （対象の図ごとに明示的に包む。Streamlitにはリサンプル用のコールバックがないため、初期表示の間引きのみ）"""
+    try:
+        from plotly_resampler import FigureResampler
+    except ImportError:
+        return fig
+    return FigureResampler(fig)
+
+# 処理済みデータのキャッシュ保存先
+CACHE_DIR = './cache'
+# 抽出処理を変更した場合に上げ、古いキャッシュを無効化する
+CACHE_VERSION = 4
+
+def _cache_key(excel_path):
+    """Excelの更新時刻・サイズと処理バージョンからキャッシュキーを作成"""
+    stat = os.stat(excel_path)
+    raw = f"{stat.st_mtime}:{stat.st_size}:{CACHE_VERSION}".encode()
+    return hashlib.md5(raw).hexdigest()[:12]
+
+# DataFrameを受け取るキャッシュ関数は、DataFrameを_付き引数（ハッシュ対象外）で渡し、
+# 読み込み時に一度だけ計算したdata_idをキャッシュキーにする（再実行ごとのDataFrameのハッシュを避ける）
+def timed_cache(**cache_kwargs):
+    """st.cache_dataで包み、関数ごとのヒット/ミス回数と直近の所要時間をセッションに記録する"""
+    def decorator(func):
+        state = threading.local()
+        
+        # 関数本体が実行された（＝キャッシュミス）ことを呼び出し側に伝える
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            state.executed = True
+            return func(*args, **kwargs)
+        
+        cached = st.cache_data(**cache_kwargs)(run)
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            state.executed = False
+            start = time.perf_counter()
+            result = cached(*args, **kwargs)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            
+            stats = st.session_state.setdefault('_cache_stats', {}).setdefault(
+                func.__name__, {'hits': 0, 'misses': 0, 'last_ms': 0.0}
+            )
+            stats['misses' if state.executed else 'hits'] += 1
+            stats['last_ms'] = round(elapsed_ms, 2)
+            return result
+        
+        wrapper.clear = cached.clear
+        return wrapper
+    return decorator
+
+# data.xlsxの実データを使う場合は環境変数 SURVEY_USE_REAL_DATA=1 を指定する
+# （実データにはgroup/workplace/employee_number/business_type/region/age_group列がなく、
+#   サイドバーの絞り込みが職務のみになるため、既定はサンプルデータのままとする）
+USE_REAL_DATA = os.environ.get('SURVEY_USE_REAL_DATA') == '1'
+
+# データ読み込み関数
+@timed_cache()
+def load_employee_data():
+    """従業員調査データを読み込む（150件の実データ）"""
+    excel_path = './data.xlsx'
+    if USE_REAL_DATA and os.path.exists(excel_path):
+        try:
+            data = load_real_survey_data(excel_path)
+            data['data_id'] = _frame_fingerprint(data['employee_data'])
+            st.success(f"📊 {len(data['employee_data'])}件の従業員調査データを使用しています")
+            return data
+        except Exception as e:
+            st.warning(f"実データの読み込みに失敗したため、ダミーデータを使用します: {e}")
     
-    .section-header h2 {
-        color: white !important;
-        margin: 0;
-        font-size: 24px;
-        font-weight: 700;
-    }
+    st.success("📊 150件の従業員調査データを使用しています")
+    data = create_dummy_data()
+    data['data_id'] = _frame_fingerprint(data['employee_data'])
+    return data
+
+def _frame_fingerprint(df):
+    """DataFrameの内容からキャッシュキー用の短いハッシュを作成（読み込み時に一度だけ計算）"""
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.md5(row_hashes.tobytes()).hexdigest()[:16]
+
+def load_real_survey_data(excel_path):
+    """実データを読み込む（処理済みデータをExcelの更新時刻・サイズごとにparquetで保存）"""
+    cache_path = os.path.join(CACHE_DIR, f"processed_{_cache_key(excel_path)}.parquet")
     
-    /* データ状況表示の改善 */
-    .data-status {
-        background: linear-gradient(135deg, #e0f2fe 0%, #f0f9ff 100%);
-        border: 1px solid #0ea5e9;
-        border-radius: 12px;
-        padding: 16px 20px;
-        margin-bottom: 24px;
-        box-shadow: 0 2px 8px rgba(14, 165, 233, 0.1);
-    }
+    # Excelが更新されていなければ、Excelの解析を省略してparquetから読み込む
+    # （読み込めない壊れたキャッシュはExcelから作り直す）
+    if os.path.exists(cache_path):
+        try:
+            return {'employee_data': pd.read_parquet(cache_path)}
+        except Exception:
+            pass
+    
+    if POLARS_AVAILABLE:
+        # 全列を文字列として読み込み、型の変換は process_real_survey_data の抽出関数に任せる
+        df = pl.read_excel(excel_path, sheet_name='Responses', infer_schema_length=0).to_pandas()
+    elif EXCEL_ENGINE == 'calamine':
+        df = pd.read_excel(excel_path, sheet_name='Responses', header=0, engine=EXCEL_ENGINE)
+    else:
+        df = _stream_responses_sheet(excel_path)
+    data = process_real_survey_data(df)
     
-    /* サイドバーヘッダー */
-    .sidebar-header {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 18px;
-        border-radius: 12px;
-        display: flex;
-        align-items: center;
-        margin-bottom: 24px;
-        box-shadow: 0 4px 16px rgba(102, 126, 234, 0.2);
-    }
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        for old_cache in glob.glob(os.path.join(CACHE_DIR, 'processed_*')):
+            os.remove(old_cache)
+        # 一時ファイルに書き出してから置き換え、書き込み途中のファイルを読まないようにする
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        data['employee_data'].to_parquet(tmp_path, compression='zstd')
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        # キャッシュの保存に失敗しても読み込み結果はそのまま利用する
+        st.warning(f"データキャッシュの保存に失敗しました: {e}")
     
-    .sidebar-logo {
-        background-color: rgba(255, 255, 255, 0.95);
-        width: 48px;
-        height: 48px;
-        border-radius: 10px;
-        display: flex;
-        justify-content: center;
-        align-items: center;
-        margin-right: 14px;
-        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.1);
-    }
+    return data
+
+def _stream_responses_sheet(excel_path):
+    """openpyxlの読み取り専用モードでResponsesシートを1回走査し、集計に使う列だけを読み込む"""
+    from openpyxl import load_workbook
+    wb = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        rows = wb['Responses'].iter_rows(values_only=True)
+        header = next(rows, ())
+        
+        # キーワードに対応する列の位置だけを保持する
+        col_map, satisfaction_map = _resolve(tuple(header))
+        wanted = {col for col in [*col_map.values(), *satisfaction_map.values()] if col is not None}
+        keep = [i for i, name in enumerate(header) if name in wanted]
+        columns = {header[i]: [] for i in keep}
+        
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            for i in keep:
+                columns[header[i]].append(row[i] if i < len(row) else None)
+    finally:
+        wb.close()
     
-    /* レスポンシブ対応 */
-    @media (max-width: 768px) {
-        .kpi-card {
-            min-height: 120px;
-            padding: 20px 16px;
-        }
-        .kpi-value {
-            font-size: 28px;
-        }
-        .kpi-title {
-            font-size: 12px;
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
+    return pd.DataFrame(columns)
 
-# データ読み込み関数
-@st.cache_data
-def load_employee_data():
-    """従業員調査データを読み込む（150件の実データ）"""
-    st.success("📊 150件の従業員調査データを使用しています")
-    return create_dummy_data()
+@st.cache_data(show_spinner=False)
+def _read_responses_sheet(excel_path, mtime, usecols):
+    """Responsesシートの指定列（0ベースの位置）だけを見出し行も含めてそのまま読み込む
+    mtimeはキャッシュキー用で、ファイル更新時のみ再読み込みする。列ラベルは元の列位置のまま"""
+    # シートに存在しない列は読み飛ばす（位置のリストで指定すると範囲外の列でエラーになるため）
+    wanted = set(usecols)
+    # calamineが利用可能な場合はRust実装のパーサーで読み込む
+    return pd.read_excel(excel_path, sheet_name='Responses', header=None, engine=EXCEL_ENGINE,
+                         usecols=lambda col: col in wanted)
 
 def load_comment_data():
     """コメントデータを読み込み・処理する"""
@@ -223,12 +244,6 @@ def load_comment_data():
         if not os.path.exists(excel_path):
             return None
             
-        # Responsesシートの生データを読み込み
-        df_raw = pd.read_excel(excel_path, sheet_name='Responses', header=None)
-        
-        if len(df_raw) < 3:
-            return None
-            
         # コメントカラムのインデックス（0ベース）
         comment_columns = {
             '期待コメント': 60,   # 最も期待が高い項目について
@@ -236,17 +251,18 @@ def load_comment_data():
             '不満コメント': 104   # 満足度が低い項目について
         }
         
+        # Responsesシートの生データをコメント列のみ読み込み
+        df_raw = _read_responses_sheet(excel_path, os.path.getmtime(excel_path), tuple(comment_columns.values()))
+        
+        if len(df_raw) < 3:
+            return None
+        
         comments = {}
         for comment_type, col_idx in comment_columns.items():
-            if col_idx < len(df_raw.columns):
-                # データ行（2行目以降）からコメントを取得
-                comment_data = []
-                for row_idx in range(2, len(df_raw)):
-                    comment = df_raw.iloc[row_idx, col_idx]
-                    if pd.notna(comment) and str(comment).strip():
-                        comment_data.append(str(comment).strip())
-                
-                comments[comment_type] = comment_data
+            if col_idx in df_raw.columns:
+                # データ行（2行目以降）から空でないコメントを列単位で取得
+                comment_data = df_raw[col_idx].iloc[2:].dropna().astype(str).str.strip()
+                comments[comment_type] = comment_data[comment_data != ''].tolist()
         
         return comments
         
@@ -254,6 +270,11 @@ def load_comment_data():
         st.error(f"コメントデータ読み込みエラー: {e}")
         return None
 
+# テキスト前処理・キーワード抽出用の正規表現
+_CLEAN_RE = re.compile(r'[^\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FAF\u3400-\u4DBF\uFF00-\uFFEFa-zA-Z0-9\s]')
+_WS_RE = re.compile(r'\s+')
+_HIRA_ONLY_RE = re.compile(r'^[ぁ-ん]+$')
+
 def preprocess_japanese_text(text):
     """日本語テキストの前処理"""
     if not text or pd.isna(text):
@@ -263,20 +284,38 @@ def preprocess_japanese_text(text):
     text = str(text)
     
     # 不要な文字を削除
-    text = re.sub(r'[^\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FAF\u3400-\u4DBF\uFF00-\uFFEFa-zA-Z0-9\s]', '', text)
+    text = _CLEAN_RE.sub('', text)
     
     # 余分な空白を削除
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = _WS_RE.sub(' ', text).strip()
     
     return text
 
+@st.cache_resource
+def _get_tokenizer():
+    """形態素解析器を作成（辞書の読み込みは一度だけ行い、全セッションで共有）"""
+    if FUGASHI_AVAILABLE:
+        try:
+            return fugashi.Tagger()
+        except RuntimeError:
+            # 辞書が見つからない場合はJanomeを使う
+            pass
+    return Tokenizer()
+
+def _noun_surfaces(tokenizer, text):
+    """形態素解析して名詞の表層形を出現順に返す"""
+    if isinstance(tokenizer, Tokenizer):
+        return [token.surface for token in tokenizer.tokenize(text)
+                if token.part_of_speech.split(',')[0] == '名詞']
+    return [word.surface for word in tokenizer(text) if word.feature.pos1 == '名詞']
+
 def extract_keywords_janome(texts, min_length=2, max_features=100):
     """Janomeを使って日本語テキストからキーワードを抽出"""
     if not texts:
         return []
     
-    # Janomeトークナイザー
-    tokenizer = Tokenizer()
+    # 形態素解析器（fugashiまたはJanome）
+    tokenizer = _get_tokenizer()
     
     # ストップワード（除外する語）
     stop_words = {
@@ -296,20 +335,14 @@ def extract_keywords_janome(texts, min_length=2, max_features=100):
         # 前処理
         cleaned_text = preprocess_japanese_text(text)
         
-        # 形態素解析
-        tokens = tokenizer.tokenize(cleaned_text)
-        
-        for token in tokens:
-            # 名詞のみ抽出
-            if token.part_of_speech.split(',')[0] in ['名詞']:
-                word = token.surface
-                
-                # 条件に合うものだけ抽出
-                if (len(word) >= min_length and 
-                    word not in stop_words and
-                    not word.isdigit() and
-                    not re.match(r'^[ぁ-ん]+$', word)):  # ひらがなのみの語を除外
-                    all_keywords.append(word)
+        # 形態素解析（名詞のみ抽出）
+        for word in _noun_surfaces(tokenizer, cleaned_text):
+            # 条件に合うものだけ抽出
+            if (len(word) >= min_length and 
+                word not in stop_words and
+                not word.isdigit() and
+                not _HIRA_ONLY_RE.match(word)):  # ひらがなのみの語を除外
+                all_keywords.append(word)
     
     # 出現頻度でソート
     keyword_counts = Counter(all_keywords)
@@ -320,7 +353,7 @@ def build_cooccurrence_network(texts, min_cooccurrence=1):
     if not texts:
         return None, None
     
-    tokenizer = Tokenizer()
+    tokenizer = _get_tokenizer()
     
     # 各テキストから名詞を抽出
     doc_keywords = []
@@ -329,27 +362,20 @@ def build_cooccurrence_network(texts, min_cooccurrence=1):
             continue
             
         cleaned_text = preprocess_japanese_text(text)
-        tokens = tokenizer.tokenize(cleaned_text)
         
         keywords = []
-        for token in tokens:
-            if token.part_of_speech.split(',')[0] in ['名詞']:
-                word = token.surface
-                if (len(word) >= 2 and 
-                    not word.isdigit() and
-                    word not in {'こと', 'もの', 'ため', 'よう', '項目', '満足', '期待'}):
-                    keywords.append(word)
+        for word in _noun_surfaces(tokenizer, cleaned_text):
+            if (len(word) >= 2 and 
+                not word.isdigit() and
+                word not in {'こと', 'もの', 'ため', 'よう', '項目', '満足', '期待'}):
+                keywords.append(word)
         
         doc_keywords.append(keywords)
     
-    # 共起関係を計算
-    cooccurrence = {}
+    # 共起関係を計算（文書ごとに異なる語の組を1回ずつ数える）
+    cooccurrence = Counter()
     for keywords in doc_keywords:
-        for i, word1 in enumerate(keywords):
-            for j, word2 in enumerate(keywords):
-                if i != j:
-                    pair = tuple(sorted([word1, word2]))
-                    cooccurrence[pair] = cooccurrence.get(pair, 0) + 1
+        cooccurrence.update(combinations(sorted(set(keywords)), 2))
     
     # 最小共起回数でフィルタリング
     filtered_cooccurrence = {pair: count for pair, count in cooccurrence.items() 
@@ -373,375 +399,382 @@ def load_timestamp_data():
         if not os.path.exists(excel_path):
             return None
             
-        # Responsesシートの生データを読み込み
-        df_raw = pd.read_excel(excel_path, sheet_name='Responses', header=None)
-        
-        if len(df_raw) < 2:
-            return None
-        
         # タイムスタンプカラムのインデックス（0ベース）
         start_time_col = 2  # 回答開始（列3）
         end_time_col = 3    # 回答完了（列4）
         
-        timestamp_data = []
+        # Responsesシートの生データをタイムスタンプ列のみ読み込み
+        df_raw = _read_responses_sheet(excel_path, os.path.getmtime(excel_path), (start_time_col, end_time_col))
         
-        # データ行（2行目以降）からタイムスタンプを取得
-        for row_idx in range(1, len(df_raw)):
-            try:
-                start_time_raw = df_raw.iloc[row_idx, start_time_col]
-                end_time_raw = df_raw.iloc[row_idx, end_time_col]
-                
-                if pd.notna(start_time_raw) and pd.notna(end_time_raw):
-                    # 日本語日時フォーマットをパース
-                    start_time = parse_japanese_datetime(str(start_time_raw))
-                    end_time = parse_japanese_datetime(str(end_time_raw))
-                    
-                    if start_time and end_time:
-                        duration_minutes = (end_time - start_time).total_seconds() / 60
-                        timestamp_data.append({
-                            'response_id': row_idx,
-                            'start_time': start_time,
-                            'end_time': end_time,
-                            'duration_minutes': duration_minutes,
-                            'date': start_time.date(),
-                            'hour': start_time.hour,
-                            'weekday': start_time.weekday(),
-                            'weekday_name': ['月', '火', '水', '木', '金', '土', '日'][start_time.weekday()]
-                        })
-            except Exception as e:
-                continue
+        if len(df_raw) < 2:
+            return None
         
-        return pd.DataFrame(timestamp_data) if timestamp_data else None
+        # データ行（2行目以降）のタイムスタンプを列単位で一括変換し、開始・完了とも解析できた行のみ残す
+        rows = df_raw.iloc[1:]
+        start_times = parse_japanese_datetime(rows[start_time_col])
+        end_times = parse_japanese_datetime(rows[end_time_col])
+        valid = start_times.notna() & end_times.notna()
+        if not valid.any():
+            return None
+        
+        start_times = start_times[valid]
+        end_times = end_times[valid]
+        weekdays = start_times.dt.weekday
+        timestamp_data = pd.DataFrame({
+            'response_id': rows.index[valid],
+            'start_time': start_times,
+            'end_time': end_times,
+            'duration_minutes': (end_times - start_times).dt.total_seconds() / 60,
+            'date': start_times.dt.date,
+            'hour': start_times.dt.hour,
+            'weekday': weekdays,
+            'weekday_name': _WEEKDAY_NAMES[weekdays.to_numpy()],
+        })
+        return timestamp_data.reset_index(drop=True)
         
     except Exception as e:
         st.error(f"タイムスタンプデータ読み込みエラー: {e}")
         return None
 
-def parse_japanese_datetime(datetime_str):
-    """日本語の日時文字列を解析してdatetimeオブジェクトに変換"""
-    try:
-        # "6月 08, 2025 08:39:24 午後" のような形式を処理
-        import re
-        
-        # 月名の日本語を英語に変換
-        month_map = {
-            '1月': 'Jan', '2月': 'Feb', '3月': 'Mar', '4月': 'Apr',
-            '5月': 'May', '6月': 'Jun', '7月': 'Jul', '8月': 'Aug', 
-            '9月': 'Sep', '10月': 'Oct', '11月': 'Nov', '12月': 'Dec'
-        }
-        
-        datetime_str = str(datetime_str).strip()
-        
-        # 午前/午後の処理
-        is_pm = '午後' in datetime_str
-        datetime_str = datetime_str.replace('午前', '').replace('午後', '').strip()
-        
-        # 日本語の月を英語に変換
-        for jp_month, en_month in month_map.items():
-            if jp_month in datetime_str:
-                datetime_str = datetime_str.replace(jp_month, en_month)
-                break
-        
-        # パターンマッチングで日時要素を抽出
-        pattern = r'(\w+)\s+(\d+),\s+(\d+)\s+(\d+):(\d+):(\d+)'
-        match = re.search(pattern, datetime_str)
-        
-        if match:
-            month_str, day, year, hour, minute, second = match.groups()
-            
-            # 月名を数値に変換
-            month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-                          'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-            month = month_names.index(month_str) + 1
-            
-            # 午後の場合は12時間を追加（ただし12時の場合は除く）
-            hour_int = int(hour)
-            if is_pm and hour_int != 12:
-                hour_int += 12
-            elif not is_pm and hour_int == 12:
-                hour_int = 0
-            
-            return datetime(int(year), month, int(day), hour_int, int(minute), int(second))
-        
-        return None
-        
-    except Exception as e:
-        return None
+# 「6月 08, 2025 08:39:24 午後」形式の日時（月, 日, 年, 時, 分, 秒）
+_DT_RE = re.compile(r'(\d{1,2})月\s+(\d+),\s+(\d+)\s+(\d+):(\d+):(\d+)')
+_WEEKDAY_NAMES = np.array(['月', '火', '水', '木', '金', '土', '日'])
+
+def parse_japanese_datetime(values):
+    """日本語の日時文字列の列を一括でdatetimeに変換（解析できない値はNaT）"""
+    values = values.astype(str)
+    parts = values.str.extract(_DT_RE).apply(pd.to_numeric, errors='coerce')
+    parts.columns = ['month', 'day', 'year', 'hour', 'minute', 'second']
+    
+    # 午後の場合は12時間を追加（ただし12時の場合は除く）、午前の12時は0時とする
+    is_pm = values.str.contains('午後', regex=False)
+    hour = parts['hour']
+    parts['hour'] = hour.where(~(is_pm & (hour != 12)), hour + 12).where(is_pm | (hour != 12), 0)
+    
+    return pd.to_datetime(parts[['year', 'month', 'day', 'hour', 'minute', 'second']], errors='coerce')
 
 def process_real_survey_data(df):
-    """実際の調査データを処理する"""
-    processed_data = []
+    """実際の調査データを処理する（列単位で一括変換）"""
+    if df is None or len(df) == 0:
+        return create_dummy_data()
     
-    # 各回答者のデータを処理
-    for idx, row in df.iterrows():
-        try:
-            # 基本情報の抽出
-            employee_data = {
-                'response_id': idx + 1,
-                'department': extract_value(row, '所属事業部', 'マーケティング部'),
-                'position': extract_value(row, '役職', '役職なし'),
-                'employment_type': extract_value(row, '雇用形態', '正社員'),
-                'job_category': extract_value(row, '職種', 'その他'),
-                'start_year': extract_numeric_value(row, '入社年度を教えてください', 2019),
-                'annual_salary': extract_numeric_value(row, '概算年収を教えてください', 500),
-                'monthly_overtime': extract_numeric_value(row, '1ヶ月当たりの平均残業時間', 20),
-                'paid_leave_rate': extract_numeric_value(row, '1年間当たりの平均有給休暇取得率', 50),
-            }
-            
-            # 主要評価指標の抽出
-            employee_data.update({
-                'nps_score': extract_nps_score(row, '総合評価：自分の親しい友人や家族に対して、この会社への転職・就職をどの程度勧めたいと思いますか？'),
-                'overall_satisfaction': extract_satisfaction_score(row, '総合満足度：自社の現在の働く環境や条件、周りの人間関係なども含めあなたはどの程度満足されていますか？'),
-                'long_term_intention': extract_satisfaction_score(row, 'あなたはこの会社でこれからも長く働きたいと思われますか？'),
-                'contribution_score': extract_satisfaction_score(row, '活躍貢献度：現在の会社や所属組織であなたはどの程度、活躍貢献できていると感じますか？'),
-            })
-            
-            # 期待度項目の抽出
-            expectation_items = [
-                ('勤務時間', '自分に合った勤務時間で働ける職場'),
-                ('休日休暇', '休日休暇がちゃんと取れる職場'),
-                ('有給休暇', '有給休暇がちゃんと取れる職場'),
-                ('勤務体系', '柔軟な勤務体系（リモートワーク、時短勤務、フレックス制など）のもとで働ける職場'),
-                ('昇給昇格', '成果に応じて早期の昇給・昇格が望める職場'),
-                ('人間関係', '人間関係が良好な職場'),
-                ('働く環境', '働きやすい仕事環境やオフィス環境がある会社'),
-                ('成長実感', '専門的なスキルや技術・知識や経験を獲得できる職場'),
-                ('将来キャリア', '自分に合った将来のキャリアパスをしっかり設計してくれる職場'),
-                ('福利厚生', '充実した福利厚生がある職場'),
-                ('評価制度', '自身の行った仕事が正当に評価される職場'),
-            ]
-            
-            for category, keyword in expectation_items:
-                expectation_score = extract_expectation_score(row, keyword)
-                employee_data[f'{category}_期待度'] = expectation_score
-            
-            # 満足度項目の抽出
-            satisfaction_items = [
-                ('勤務時間', '自分に合った勤務時間で働ける'),
-                ('休日休暇', '休日休暇がちゃんと取れる'),
-                ('有給休暇', '有給休暇がちゃんと取れる'),
-                ('勤務体系', '柔軟な勤務体系（リモートワーク、時短勤務、フレックス制など）のもとで働ける'),
-                ('昇給昇格', '成果に応じて早期の昇給・昇格が望める体制について'),
-                ('人間関係', '人間関係が良好な環境について'),
-                ('働く環境', '働きやすい仕事環境やオフィス環境がある会社'),
-                ('成長実感', '専門的なスキルや技術・知識や経験の獲得について'),
-                ('将来キャリア', '自分に合った将来のキャリアパス設計について'),
-                ('福利厚生', '充実した福利厚生について'),
-                ('評価制度', '自身の行った仕事が正当に評価される体制について'),
-            ]
-            
-            for category, keyword in satisfaction_items:
-                satisfaction_score = extract_satisfaction_score_detailed(row, keyword)
-                employee_data[f'{category}_満足度'] = satisfaction_score
-            
-            processed_data.append(employee_data)
-            
-        except Exception as e:
-            st.warning(f"行 {idx + 1} の処理でエラー: {e}")
-            continue
+    col_map, satisfaction_map = _resolve(tuple(df.columns))
     
-    if processed_data:
-        return {'employee_data': pd.DataFrame(processed_data)}
-    else:
-        return create_dummy_data()
+    def column(keyword, mapping=col_map):
+        col = mapping[keyword]
+        return df[col] if col is not None else None
+    
+    columns = {'response_id': np.arange(1, len(df) + 1)}
+    
+    # 基本情報の抽出
+    for name, keyword, default in _TEXT_ITEMS:
+        columns[name] = extract_value(column(keyword), default)
+    
+    for name, keyword, default in _NUMERIC_ITEMS:
+        columns[name] = extract_numeric_value(column(keyword), default)
+    
+    # 主要評価指標の抽出
+    for name, keyword, extractor in _SCORE_ITEMS:
+        columns[name] = extractor(column(keyword))
+    
+    # 期待度・満足度項目の抽出（どちらも同じ変換を列単位で一括適用）
+    for suffix, items, mapping in (('期待度', _EXPECTATION_ITEMS, col_map),
+                                   ('満足度', _SATISFACTION_ITEMS, satisfaction_map)):
+        for category, keyword in items:
+            columns[f'{category}_{suffix}'] = extract_item_score(column(keyword, mapping))
+    
+    # 列の辞書から一度だけDataFrameを構築し、インデックスは付け替えのみ（データはコピーしない）
+    employee_data = pd.DataFrame(columns, index=df.index, copy=False)
+    employee_data.index = pd.RangeIndex(len(employee_data))
+    return {'employee_data': _optimize_dtypes(employee_data)}
 
-def extract_value(row, keyword, default=''):
-    """行から特定のキーワードを含む列の値を抽出"""
-    for col in row.index:
-        if str(col).find(keyword) != -1:
-            value = row[col]
-            return str(value) if pd.notna(value) else default
-    return default
-
-def extract_numeric_value(row, keyword, default=0):
-    """行から数値を抽出"""
-    for col in row.index:
-        if str(col).find(keyword) != -1:
-            value = row[col]
-            if pd.notna(value):
-                try:
-                    return float(str(value).replace(',', ''))
-                except:
-                    return default
-    return default
+# Promoter/Passive/Detractor表記の数値変換表
+_NPS_MAP = {'Promoter': 9, 'Passive': 7, 'Detractor': 4}
+_SAT_MAP = {'Promoter': 5, 'Passive': 3, 'Detractor': 2}
+_CATEGORY_LABEL_RE = r'(Promoter|Passive|Detractor)'
+
+# 低カーディナリティの属性列（フィルター項目を含む）と、1-10の整数スコア列
+CATEGORICAL_COLUMNS = [
+    'department', 'position', 'employment_type', 'job_category',
+    'group', 'workplace', 'employee_number', 'business_type', 'region', 'age_group',
+]
+SCORE_COLUMNS = ['nps_score', 'overall_satisfaction', 'long_term_intention', 'contribution_score']
+
+# 満足度・期待度の評価カテゴリーと、対応する列名
+SURVEY_CATEGORIES = ['勤務時間', '休日休暇', '有給休暇', '勤務体系', '昇給昇格', '人間関係', 
+                     '働く環境', '成長実感', '将来キャリア', '福利厚生', '評価制度']
+SAT_COLS = [f'{c}_満足度' for c in SURVEY_CATEGORIES]
+EXP_COLS = [f'{c}_期待度' for c in SURVEY_CATEGORIES]
+
+# 部署情報がない場合に表示する個別回答者の列
+DISPLAY_COLS = ('response_id', 'overall_satisfaction', 'nps_score', 'contribution_score',
+                'annual_salary', 'monthly_overtime', 'paid_leave_rate')
+
+def _optimize_dtypes(df):
+    """属性列をcategory型、スコア列をint8型、その他の数値列を最小の型に変換してメモリ使用量を削減"""
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    
+    score_cols = [
+        c for c in df.columns
+        if c in SCORE_COLUMNS or c.endswith('_満足度') or c.endswith('_期待度')
+    ]
+    df[score_cols] = df[score_cols].astype('int8')
+    
+    # 残りの数値列（ID・年収・残業時間など）も値の範囲に収まる最小の型に縮小
+    for col in df.select_dtypes(include='integer').columns.difference(score_cols):
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    for col in df.select_dtypes(include='floating').columns:
+        df[col] = pd.to_numeric(df[col], downcast='float')
+    return df
 
-def extract_nps_score(row, keyword):
+def _resolve_columns(df_cols, keywords, start=0):
+    """キーワードごとに、start番目以降でそのキーワードを含む最初の列名を対応付ける"""
+    # 列名の文字列化は一度だけ行い、各キーワードの探索で使い回す
+    df_cols = list(df_cols)
+    names = [str(c) for c in df_cols]
+    
+    # 全キーワードの正規表現（選択）で、いずれかのキーワードを含む列だけに絞り込む
+    pattern = re.compile('|'.join(re.escape(kw) for kw in keywords))
+    candidates = [i for i in range(start, len(names)) if pattern.search(names[i])]
+    
+    col_map = {}
+    for kw in keywords:
+        idx = next((i for i in candidates if kw in names[i]), None)
+        col_map[kw] = df_cols[idx] if idx is not None else None
+    return col_map
+
+def _to_int_score(series, default):
+    """数値に変換できない値はデフォルト値とし、小数点以下を切り捨てる"""
+    return np.trunc(pd.to_numeric(series, errors='coerce')).fillna(default).astype(int)
+
+def _decode_category_score(series, category_map, default):
+    """Promoter/Passive/Detractor表記を変換表で数値化し、それ以外は数値として解釈"""
+    # 「7 (Passive)」のように数値と併記された表記も含め、ラベル部分を取り出して変換
+    labels = series.astype(str).str.extract(_CATEGORY_LABEL_RE, expand=False)
+    label_scores = labels.map(category_map)
+    return label_scores.combine_first(_to_int_score(series, default)).astype('int8')
+
+def extract_value(series, default=''):
+    """列の値を文字列として抽出（欠損値はデフォルト値）"""
+    if series is None:
+        return default
+    return series.astype(str).where(series.notna(), default)
+
+def extract_numeric_value(series, default=0):
+    """列から数値を抽出（カンマ区切りに対応）"""
+    if series is None:
+        return default
+    values = series.astype(str).str.replace(',', '', regex=False)
+    values = pd.to_numeric(values, errors='coerce').fillna(default)
+    # 整数値のみの列はint32、小数を含む列はfloat32に縮小
+    if float(default).is_integer() and (values % 1 == 0).all():
+        return values.astype('int32')
+    return values.astype('float32')
+
+def extract_nps_score(series):
     """NPS スコアを抽出（0-10の値）"""
-    for col in row.index:
-        if str(col).find(keyword) != -1:
-            value = str(row[col])
-            if 'Promoter' in value:
-                return 9
-            elif 'Passive' in value:
-                return 7
-            elif 'Detractor' in value:
-                return 4
-            else:
-                try:
-                    return int(float(value))
-                except:
-                    return 5
-    return 5
+    if series is None:
+        return 5
+    return _decode_category_score(series, _NPS_MAP, 5)
 
-def extract_satisfaction_score(row, keyword):
+def extract_satisfaction_score(series):
     """満足度スコアを抽出（1-5の値）"""
-    for col in row.index:
-        if str(col).find(keyword) != -1:
-            value = str(row[col])
-            if 'Promoter' in value:
-                return 5
-            elif 'Passive' in value:
-                return 3
-            elif 'Detractor' in value:
-                return 2
-            else:
-                try:
-                    return int(float(value))
-                except:
-                    return 3
-    return 3
-
-def extract_expectation_score(row, keyword):
-    """期待度スコアを抽出"""
-    for col in row.index:
-        if str(col).find(keyword) != -1:
-            value = row[col]
-            if pd.notna(value):
-                try:
-                    return int(float(value))
-                except:
-                    return 3
-    return 3
-
-def extract_satisfaction_score_detailed(row, keyword):
-    """詳細満足度スコアを抽出"""
-    for col in row.index:
-        if str(col).find(keyword) != -1:
-            value = row[col]
-            if pd.notna(value):
-                try:
-                    return int(float(value))
-                except:
-                    return 3
-    return 3
+    if series is None:
+        return 3
+    return _decode_category_score(series, _SAT_MAP, 3)
+
+def extract_item_score(series):
+    """期待度・満足度項目のスコアを抽出（1-5の値、変換できない値は3）"""
+    if series is None:
+        return 3
+    return _to_int_score(series, 3).astype('int8')
+
+# 調査項目の定義（抽出関数を参照するため、抽出関数の定義後に置く）
+# 基本情報の項目（出力列名, 列名キーワード, デフォルト値）
+_TEXT_ITEMS = (
+    ('department', '所属事業部', 'マーケティング部'),
+    ('position', '役職', '役職なし'),
+    ('employment_type', '雇用形態', '正社員'),
+    ('job_category', '職種', 'その他'),
+)
+_NUMERIC_ITEMS = (
+    ('start_year', '入社年度を教えてください', 2019),
+    ('annual_salary', '概算年収を教えてください', 500),
+    ('monthly_overtime', '1ヶ月当たりの平均残業時間', 20),
+    ('paid_leave_rate', '1年間当たりの平均有給休暇取得率', 50),
+)
+
+# 主要評価指標の項目（出力列名, 列名キーワード, 抽出関数）
+_SCORE_ITEMS = (
+    ('nps_score', '総合評価：自分の親しい友人や家族に対して、この会社への転職・就職をどの程度勧めたいと思いますか？', extract_nps_score),
+    ('overall_satisfaction', '総合満足度：自社の現在の働く環境や条件、周りの人間関係なども含めあなたはどの程度満足されていますか？', extract_satisfaction_score),
+    ('long_term_intention', 'あなたはこの会社でこれからも長く働きたいと思われますか？', extract_satisfaction_score),
+    ('contribution_score', '活躍貢献度：現在の会社や所属組織であなたはどの程度、活躍貢献できていると感じますか？', extract_satisfaction_score),
+)
+
+# 期待度項目
+_EXPECTATION_ITEMS = (
+    ('勤務時間', '自分に合った勤務時間で働ける職場'),
+    ('休日休暇', '休日休暇がちゃんと取れる職場'),
+    ('有給休暇', '有給休暇がちゃんと取れる職場'),
+    ('勤務体系', '柔軟な勤務体系（リモートワーク、時短勤務、フレックス制など）のもとで働ける職場'),
+    ('昇給昇格', '成果に応じて早期の昇給・昇格が望める職場'),
+    ('人間関係', '人間関係が良好な職場'),
+    ('働く環境', '働きやすい仕事環境やオフィス環境がある会社'),
+    ('成長実感', '専門的なスキルや技術・知識や経験を獲得できる職場'),
+    ('将来キャリア', '自分に合った将来のキャリアパスをしっかり設計してくれる職場'),
+    ('福利厚生', '充実した福利厚生がある職場'),
+    ('評価制度', '自身の行った仕事が正当に評価される職場'),
+)
+
+# 満足度項目
+_SATISFACTION_ITEMS = (
+    ('勤務時間', '自分に合った勤務時間で働ける'),
+    ('休日休暇', '休日休暇がちゃんと取れる'),
+    ('有給休暇', '有給休暇がちゃんと取れる'),
+    ('勤務体系', '柔軟な勤務体系（リモートワーク、時短勤務、フレックス制など）のもとで働ける'),
+    ('昇給昇格', '成果に応じて早期の昇給・昇格が望める体制について'),
+    ('人間関係', '人間関係が良好な環境について'),
+    ('働く環境', '働きやすい仕事環境やオフィス環境がある会社'),
+    ('成長実感', '専門的なスキルや技術・知識や経験の獲得について'),
+    ('将来キャリア', '自分に合った将来のキャリアパス設計について'),
+    ('福利厚生', '充実した福利厚生について'),
+    ('評価制度', '自身の行った仕事が正当に評価される体制について'),
+)
+
+# 列名解決に使うキーワード（満足度項目は期待度項目の後ろの区間から探す）
+_SURVEY_KEYWORDS = tuple(
+    [keyword for _, keyword, _ in _TEXT_ITEMS + _NUMERIC_ITEMS + _SCORE_ITEMS]
+    + [keyword for _, keyword in _EXPECTATION_ITEMS]
+)
+_SATISFACTION_KEYWORDS = tuple(keyword for _, keyword in _SATISFACTION_ITEMS)
+
+@st.cache_resource(max_entries=4)
+def _resolve(columns_tuple):
+    """列名タプルごとに、キーワード→列名の対応表と満足度項目用の対応表を作成（セッション・再実行をまたいで共有）"""
+    col_map = _resolve_columns(columns_tuple, _SURVEY_KEYWORDS)
+    
+    # 満足度のキーワードは期待度の列名にも部分一致するため（例: 「〜で働ける」と「〜で働ける職場」）、
+    # 期待度区間の最後の列より後ろから探索する。キーワードが期待度と同一の項目もあるため別の表に分ける
+    positions = {c: i for i, c in enumerate(columns_tuple)}
+    expectation_idx = [
+        positions[col_map[kw]] for _, kw in _EXPECTATION_ITEMS if col_map[kw] is not None
+    ]
+    start = max(expectation_idx) + 1 if expectation_idx else 0
+    satisfaction_map = _resolve_columns(columns_tuple, _SATISFACTION_KEYWORDS, start)
+    return col_map, satisfaction_map
+
+# シード固定で内容が毎回同じため、ダミーデータは一度だけ生成して使い回す
+_DUMMY = None
 
 def create_dummy_data():
     """ダミーデータを作成（データが読み込めない場合）"""
-    np.random.seed(42)
+    global _DUMMY
+    if _DUMMY is None:
+        _DUMMY = _build_dummy()
+    # 呼び出し側は読み取りのみのため浅いコピーで十分
+    return {'employee_data': _DUMMY.copy(deep=False)}
+
+def _build_dummy():
+    """ダミーの従業員データを生成（全従業員分を配列でまとめて作成）"""
+    rng = np.random.default_rng(42)
     n_employees = 30
     
     # より現実的なデータ分布を作成
-    departments = ['マーケティング部', 'エンジニアリング部', '人事部', '営業部', '総務部', '経理部']
-    positions = ['役職なし', 'チームリーダー', 'マネージャー', '主任', '課長']
+    departments = np.array(['マーケティング部', 'エンジニアリング部', '人事部', '営業部', '総務部', '経理部'])
+    positions = np.array(['役職なし', 'チームリーダー', 'マネージャー', '主任', '課長'])
     groups = ['Aグループ', 'Bグループ', 'Cグループ', 'Dグループ']
     workplaces = ['東京本社', '大阪支社', '名古屋支社', '福岡支社', '横浜オフィス']
     business_types = ['営業系', '技術系', '管理系', 'サポート系', '企画系']
     regions = ['関東', '関西', '中部', '九州', '首都圏']
     job_categories = ['正社員', '契約社員', 'パート', '派遣']
-    age_groups = ['20代', '30代', '40代', '50代以上']
+    age_groups = np.array(['20代', '30代', '40代', '50代以上'])
     
     # 部署別に特徴のあるデータを生成
-    employee_data_list = []
-    
-    for i in range(n_employees):
-        department = np.random.choice(departments, p=[0.25, 0.3, 0.1, 0.25, 0.05, 0.05])
-        
-        # 部署に応じてポジションの分布を調整
-        if department in ['人事部', '総務部', '経理部']:
-            position = np.random.choice(positions, p=[0.4, 0.3, 0.2, 0.05, 0.05])
-        elif department == 'エンジニアリング部':
-            position = np.random.choice(positions, p=[0.6, 0.2, 0.1, 0.05, 0.05])
-        else:
-            position = np.random.choice(positions, p=[0.5, 0.25, 0.15, 0.05, 0.05])
-        
-        # 年齢層を設定
-        age_group = np.random.choice(age_groups, p=[0.3, 0.35, 0.25, 0.1])
-        
-        # 年齢に応じて経験年数を調整
-        if age_group == '20代':
-            start_year = np.random.choice(range(2020, 2025))
-            base_salary = np.random.normal(350, 50)
-        elif age_group == '30代':
-            start_year = np.random.choice(range(2015, 2023))
-            base_salary = np.random.normal(500, 80)
-        elif age_group == '40代':
-            start_year = np.random.choice(range(2010, 2020))
-            base_salary = np.random.normal(650, 100)
-        else:  # 50代以上
-            start_year = np.random.choice(range(2005, 2018))
-            base_salary = np.random.normal(750, 120)
-        
-        # ポジションに応じて給与を調整
-        if position == 'マネージャー':
-            salary_multiplier = 1.3
-        elif position == '課長':
-            salary_multiplier = 1.5
-        elif position in ['チームリーダー', '主任']:
-            salary_multiplier = 1.1
-        else:
-            salary_multiplier = 1.0
-        
-        annual_salary = int(max(300, min(1200, base_salary * salary_multiplier)))
-        
-        # 満足度指標（相関を持たせる）
-        base_satisfaction = np.random.normal(3.2, 0.8)
-        satisfaction_noise = np.random.normal(0, 0.3)
-        
-        overall_satisfaction = max(1, min(5, int(base_satisfaction + satisfaction_noise)))
-        
-        # 推奨スコア（10段階評価）を生成
-        base_recommend = 6.5  # 基準推奨スコア
-        recommend_noise = np.random.normal(0, 1.2)
-        recommend_score = max(1, min(10, int(base_recommend + recommend_noise)))
-        
-        # nps_scoreも同じ値を使用（10段階スケール）
-        nps_score = recommend_score
-        
-        # その他の指標
-        contribution_score = max(1, min(5, int(base_satisfaction + np.random.normal(0, 0.4))))
-        long_term_intention = max(1, min(5, int(base_satisfaction + np.random.normal(0, 0.5))))
-        
-        employee_data_list.append({
-            'response_id': i + 1,
-            'department': department,
-            'position': position,
-            'start_year': start_year,
-            'annual_salary': annual_salary,
-            'monthly_overtime': max(0, min(80, int(np.random.normal(25, 15)))),
-            'paid_leave_rate': max(10, min(100, int(np.random.normal(65, 20)))),
-            'recommend_score': recommend_score,
-            'nps_score': nps_score,
-            'overall_satisfaction': overall_satisfaction,
-            'long_term_intention': long_term_intention,
-            'contribution_score': contribution_score,
-            # フィルター用項目
-            'group': np.random.choice(groups),
-            'workplace': np.random.choice(workplaces),
-            'employee_number': f"{((i // 10) * 10 + 1):02d}-{((i // 10 + 1) * 10):02d}",
-            'business_type': np.random.choice(business_types),
-            'region': np.random.choice(regions),
-            'job_category': np.random.choice(job_categories, p=[0.7, 0.15, 0.1, 0.05]),
-            'age_group': age_group,
-        })
-    
-    employee_data = pd.DataFrame(employee_data_list)
-    
-    categories = ['勤務時間', '休日休暇', '有給休暇', '勤務体系', '昇給昇格', '人間関係', 
-                 '働く環境', '成長実感', '将来キャリア', '福利厚生', '評価制度']
-    
-    for category in categories:
-        employee_data[f'{category}_期待度'] = np.random.choice(range(1, 6), n_employees)
-        employee_data[f'{category}_満足度'] = np.random.choice(range(1, 6), n_employees)
-    
-    return {'employee_data': employee_data}
+    dept_idx = rng.choice(len(departments), n_employees, p=[0.25, 0.3, 0.1, 0.25, 0.05, 0.05])
+    department = departments[dept_idx]
+    
+    # 部署に応じてポジションの分布を調整（0: 管理部門, 1: エンジニアリング部, 2: その他）
+    position_p = np.array([
+        [0.4, 0.3, 0.2, 0.05, 0.05],
+        [0.6, 0.2, 0.1, 0.05, 0.05],
+        [0.5, 0.25, 0.15, 0.05, 0.05],
+    ])
+    dept_kind = np.where(np.isin(department, ['人事部', '総務部', '経理部']), 0,
+                         np.where(department == 'エンジニアリング部', 1, 2))
+    cum_p = position_p.cumsum(axis=1)[dept_kind]
+    position_idx = (rng.random(n_employees)[:, None] > cum_p[:, :-1]).sum(axis=1)
+    position = positions[position_idx]
+    
+    # 年齢層を設定し、年齢に応じて入社年度・基本給を調整
+    age_idx = rng.choice(len(age_groups), n_employees, p=[0.3, 0.35, 0.25, 0.1])
+    start_low = np.array([2020, 2015, 2010, 2005])
+    start_high = np.array([2025, 2023, 2020, 2018])
+    salary_mean = np.array([350, 500, 650, 750])
+    salary_sd = np.array([50, 80, 100, 120])
+    start_year = rng.integers(start_low[age_idx], start_high[age_idx], dtype=np.int16)
+    base_salary = rng.normal(salary_mean[age_idx], salary_sd[age_idx])
+    
+    # ポジションに応じて給与を調整
+    salary_multiplier = np.array([1.0, 1.1, 1.3, 1.1, 1.5])[position_idx]
+    annual_salary = np.trunc(np.clip(base_salary * salary_multiplier, 300, 1200)).astype(np.int16)
+    
+    def clipped_int(values, low, high):
+        """小数点以下を切り捨てて範囲内に収める"""
+        return np.clip(np.trunc(values), low, high).astype(np.int16)
+    
+    # 満足度指標（相関を持たせる）
+    base_satisfaction = rng.normal(3.2, 0.8, n_employees)
+    overall_satisfaction = clipped_int(base_satisfaction + rng.normal(0, 0.3, n_employees), 1, 5)
+    
+    # 推奨スコア（10段階評価）を生成、nps_scoreも同じ値を使用
+    recommend_score = clipped_int(6.5 + rng.normal(0, 1.2, n_employees), 1, 10)
+    
+    # その他の指標
+    contribution_score = clipped_int(base_satisfaction + rng.normal(0, 0.4, n_employees), 1, 5)
+    long_term_intention = clipped_int(base_satisfaction + rng.normal(0, 0.5, n_employees), 1, 5)
+    
+    block = np.arange(n_employees) // 10
+    employee_data = pd.DataFrame({
+        'response_id': np.arange(1, n_employees + 1),
+        'department': department,
+        'position': position,
+        'start_year': start_year,
+        'annual_salary': annual_salary,
+        'monthly_overtime': clipped_int(rng.normal(25, 15, n_employees), 0, 80),
+        'paid_leave_rate': clipped_int(rng.normal(65, 20, n_employees), 10, 100),
+        'recommend_score': recommend_score,
+        'nps_score': recommend_score.copy(),
+        'overall_satisfaction': overall_satisfaction,
+        'long_term_intention': long_term_intention,
+        'contribution_score': contribution_score,
+        # フィルター用項目
+        'group': rng.choice(groups, n_employees),
+        'workplace': rng.choice(workplaces, n_employees),
+        'employee_number': [f"{b * 10 + 1:02d}-{(b + 1) * 10:02d}" for b in block],
+        'business_type': rng.choice(business_types, n_employees),
+        'region': rng.choice(regions, n_employees),
+        'job_category': rng.choice(job_categories, n_employees, p=[0.7, 0.15, 0.1, 0.05]),
+        'age_group': age_groups[age_idx],
+    })
+    
+    # 期待度・満足度の全列を1回の乱数生成でまとめて作成
+    cat_cols = EXP_COLS + SAT_COLS
+    cat_scores = rng.integers(1, 6, size=(n_employees, len(cat_cols)), dtype=np.int8)
+    employee_data = pd.concat([employee_data, pd.DataFrame(cat_scores, columns=cat_cols)], axis=1)
+    
+    return _optimize_dtypes(employee_data)
 
-@st.cache_data
-def calculate_kpis(data):
-    """KPIを計算する"""
-    if 'employee_data' not in data:
+@timed_cache(ttl=None, show_spinner=False)
+def calculate_kpis(data_id, _df):
+    """KPIを計算する（キャッシュキーはdata_idのみで、_dfはハッシュしない）
+    呼び出し側のデータ読み込みスピナー内で実行されるため、キャッシュ側のスピナーは出さない"""
+    if _df is None:
         return {}
     
-    df = data['employee_data']
+    df = _df
     
     # 推奨度計算（10段階評価の平均値）
     if 'recommend_score' in df.columns:
@@ -751,21 +784,19 @@ def calculate_kpis(data):
     else:
         nps = 6.5  # デフォルト値
     
-    # 満足度カテゴリー
-    categories = ['勤務時間', '休日休暇', '有給休暇', '勤務体系', '昇給昇格', '人間関係', 
-                 '働く環境', '成長実感', '将来キャリア', '福利厚生', '評価制度']
-    
-    satisfaction_by_category = {}
-    expectation_by_category = {}
-    gap_by_category = {}
+    # 満足度・期待度の両方が揃っているカテゴリーについて、列をまとめて一括で平均を計算
+    if set(SAT_COLS).issubset(df.columns) and set(EXP_COLS).issubset(df.columns):
+        available, sat_cols, exp_cols = SURVEY_CATEGORIES, SAT_COLS, EXP_COLS
+    else:
+        available = [c for c in SURVEY_CATEGORIES if f'{c}_満足度' in df.columns and f'{c}_期待度' in df.columns]
+        sat_cols = [f'{c}_満足度' for c in available]
+        exp_cols = [f'{c}_期待度' for c in available]
+    sat_means = np.nanmean(df[sat_cols].to_numpy(dtype=np.float64), axis=0)
+    exp_means = np.nanmean(df[exp_cols].to_numpy(dtype=np.float64), axis=0)
     
-    for category in categories:
-        sat_col = f'{category}_満足度'
-        exp_col = f'{category}_期待度'
-        if sat_col in df.columns and exp_col in df.columns:
-            satisfaction_by_category[category] = df[sat_col].mean()
-            expectation_by_category[category] = df[exp_col].mean()
-            gap_by_category[category] = df[sat_col].mean() - df[exp_col].mean()
+    satisfaction_by_category = dict(zip(available, sat_means))
+    expectation_by_category = dict(zip(available, exp_means))
+    gap_by_category = dict(zip(available, sat_means - exp_means))
     
     return {
         'total_employees': len(df),
@@ -782,6 +813,23 @@ def calculate_kpis(data):
         'gap_by_category': gap_by_category,
     }
 
+# KPI評価ラベル（良好, 要改善, 普通）
+_NPS_LABELS = ("📈 良好", "📉 要改善", "⚠️ 普通")
+_SATISFACTION_LABELS = ("😊 良好", "😔 要改善", "😐 普通")
+_CONTRIBUTION_LABELS = ("⭐ 高い", "💔 低い", "⚖️ 普通")
+_INTENTION_LABELS = ("🏢 高い", "⚠️ 低い", "➖ 普通")
+_OVERTIME_LABELS = ("✅ 適正", "⚠️ 多い", "⚖️ 普通")
+_LEAVE_LABELS = ("✅ 良好", "⚠️ 低い", "➖ 普通")
+
+def _kpi_status(value, good, bad, labels):
+    """閾値からメトリクスの評価ラベルとdelta_colorを決定（good < bad の場合は値が小さいほど良い）"""
+    sign = 1 if good >= bad else -1
+    if sign * value >= sign * good:
+        return labels[0], "normal"
+    if sign * value <= sign * bad:
+        return labels[1], "inverse"
+    return labels[2], "off"
+
 def show_kpi_overview(data, kpis):
     """KPI概要を表示（Streamlit標準コンポーネント使用）"""
     st.header("📊 総合KPIダッシュボード")
@@ -802,8 +850,7 @@ def show_kpi_overview(data, kpis):
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        nps_delta = "📈 良好" if kpis['nps'] >= 7 else "📉 要改善" if kpis['nps'] <= 5 else "⚠️ 普通"
-        nps_color = "normal" if kpis['nps'] >= 7 else "inverse" if kpis['nps'] <= 5 else "off"
+        nps_delta, nps_color = _kpi_status(kpis['nps'], 7, 5, _NPS_LABELS)
         st.metric(
             label="📈 eNPS",
             value=f"{kpis['nps']:.1f}",
@@ -814,8 +861,7 @@ def show_kpi_overview(data, kpis):
     
     with col2:
         satisfaction = kpis['avg_satisfaction']
-        sat_delta = f"😊 良好" if satisfaction >= 4 else "😔 要改善" if satisfaction <= 2.5 else "😐 普通"
-        sat_color = "normal" if satisfaction >= 4 else "inverse" if satisfaction <= 2.5 else "off"
+        sat_delta, sat_color = _kpi_status(satisfaction, 4, 2.5, _SATISFACTION_LABELS)
         st.metric(
             label="😊 総合満足度",
             value=f"{satisfaction:.1f}/5",
@@ -826,8 +872,7 @@ def show_kpi_overview(data, kpis):
     
     with col3:
         contribution = kpis['avg_contribution']
-        cont_delta = "⭐ 高い" if contribution >= 4 else "💔 低い" if contribution <= 2.5 else "⚖️ 普通"
-        cont_color = "normal" if contribution >= 4 else "inverse" if contribution <= 2.5 else "off"
+        cont_delta, cont_color = _kpi_status(contribution, 4, 2.5, _CONTRIBUTION_LABELS)
         st.metric(
             label="⭐ 活躍貢献度",
             value=f"{contribution:.1f}/5",
@@ -838,8 +883,7 @@ def show_kpi_overview(data, kpis):
     
     with col4:
         intention = kpis['avg_long_term_intention']
-        int_delta = "🏢 高い" if intention >= 4 else "⚠️ 低い" if intention <= 2.5 else "➖ 普通"
-        int_color = "normal" if intention >= 4 else "inverse" if intention <= 2.5 else "off"
+        int_delta, int_color = _kpi_status(intention, 4, 2.5, _INTENTION_LABELS)
         st.metric(
             label="🏢 勤続意向",
             value=f"{intention:.1f}/5",
@@ -863,8 +907,7 @@ def show_kpi_overview(data, kpis):
         st.caption("給与水準")
     
     with col2:
-        overtime_delta = "⚠️ 多い" if kpis['avg_overtime'] >= 40 else "✅ 適正" if kpis['avg_overtime'] <= 20 else "⚖️ 普通"
-        overtime_color = "inverse" if kpis['avg_overtime'] >= 40 else "normal" if kpis['avg_overtime'] <= 20 else "off"
+        overtime_delta, overtime_color = _kpi_status(kpis['avg_overtime'], 20, 40, _OVERTIME_LABELS)
         st.metric(
             label="⏰ 月平均残業時間",
             value=f"{kpis['avg_overtime']:.1f}h",
@@ -874,8 +917,7 @@ def show_kpi_overview(data, kpis):
         st.caption("労働時間管理")
     
     with col3:
-        leave_delta = "✅ 良好" if kpis['avg_leave_usage'] >= 80 else "⚠️ 低い" if kpis['avg_leave_usage'] <= 50 else "➖ 普通"
-        leave_color = "normal" if kpis['avg_leave_usage'] >= 80 else "inverse" if kpis['avg_leave_usage'] <= 50 else "off"
+        leave_delta, leave_color = _kpi_status(kpis['avg_leave_usage'], 80, 50, _LEAVE_LABELS)
         st.metric(
             label="🏖️ 有給取得率",
             value=f"{kpis['avg_leave_usage']:.1f}%",
@@ -897,6 +939,374 @@ def show_kpi_overview(data, kpis):
         )
         st.caption("平均勤続期間")
 
+# 満足度分析のグラフはKPI値のタプルをキーにキャッシュし、再描画ごとの再構築を避ける
+def _rounded(values, ndigits=3):
+    """キャッシュキー用に数値を丸めたタプルへ変換"""
+    return tuple(round(float(v), ndigits) for v in values)
+
+@st.cache_resource
+def _radar_satisfaction(categories_tuple, values_tuple):
+    """満足度レーダーチャートを作成"""
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    fig.add_trace(go.Scatterpolar(
+        r=list(values_tuple),
+        theta=list(categories_tuple),
+        fill='toself',
+        name='満足度',
+        marker_color='rgba(46, 204, 113, 0.6)',
+        line=dict(color='rgba(46, 204, 113, 1)', width=3)
+    ))
+    
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(visible=True, range=[0, 5], tickfont=dict(size=10)),
+            angularaxis=dict(tickfont=dict(size=9))
+        ),
+        showlegend=False,
+        title="満足度レーダーチャート",
+        height=400
+    )
+    return fig
+
+@st.cache_resource
+def _radar_satisfaction_vs_expectation(categories_tuple, satisfaction_tuple, expectation_tuple):
+    """満足度と期待度を重ねたレーダーチャートを作成"""
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    fig.add_trace(go.Scatterpolar(
+        r=list(satisfaction_tuple),
+        theta=list(categories_tuple),
+        fill='toself',
+        name='満足度',
+        marker_color='rgba(46, 204, 113, 0.6)',
+        line=dict(color='rgba(46, 204, 113, 1)', width=2)
+    ))
+    fig.add_trace(go.Scatterpolar(
+        r=list(expectation_tuple),
+        theta=list(categories_tuple),
+        fill='toself',
+        name='期待度',
+        marker_color='rgba(52, 152, 219, 0.4)',
+        line=dict(color='rgba(52, 152, 219, 1)', width=2)
+    ))
+    
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(visible=True, range=[0, 5], tickfont=dict(size=10)),
+            angularaxis=dict(tickfont=dict(size=9))
+        ),
+        title="満足度 vs 期待度",
+        height=400
+    )
+    return fig
+
+@st.cache_resource
+def _satisfaction_ranking_bar(categories_tuple, values_tuple):
+    """カテゴリ別満足度ランキングの横棒グラフを作成"""
+    import plotly.express as px
+    satisfaction_df = pd.DataFrame({
+        'カテゴリ': list(categories_tuple),
+        '満足度': list(values_tuple)
+    }).sort_values('満足度', ascending=True)
+    
+    fig = px.bar(
+        satisfaction_df,
+        x='満足度',
+        y='カテゴリ',
+        orientation='h',
+        title="カテゴリ別満足度ランキング",
+        color='満足度',
+        color_continuous_scale='RdYlGn',
+        range_color=[1, 5],
+        height=600
+    )
+    
+    fig.update_layout(
+        xaxis_title="満足度 (1-5点)",
+        yaxis_title="",
+        coloraxis_colorbar=dict(title="満足度スコア")
+    )
+    return fig
+
+# 4象限の定義（強み, 優先改善課題, 現状維持項目, 弱み の順）
+_QUADRANT_LABELS = np.array(['💪 強み', '🔴 優先改善課題', '✅ 現状維持項目', '⚫ 弱み'])
+_QUADRANT_COLORS = np.array(['#48BB78', '#F56565', '#9F7AEA', '#ED8936'])  # 緑, 赤, 紫, オレンジ
+_QUADRANT_PRIORITY = np.array([4, 1, 3, 2])
+_QUADRANT_TEXT_POSITIONS = np.array([
+    ["top center", "top right", "middle right"],
+    ["top center", "top left", "middle left"],
+    ["bottom center", "bottom right", "middle right"],
+    ["bottom center", "bottom left", "middle left"],
+])
+
+def _classify_quadrants(x, y, mid_x=3, mid_y=3):
+    """満足度(x)・期待度(y)の配列から象限インデックスの配列を返す"""
+    hi_x = x >= mid_x
+    hi_y = y >= mid_y
+    return np.where(hi_x, np.where(hi_y, 0, 2), np.where(hi_y, 1, 3))
+
+@st.cache_resource
+def _quadrant_scatter(categories_tuple, satisfaction_tuple, expectation_tuple, gap_tuple):
+    """期待度 vs 満足度の4象限プロットを作成"""
+    import plotly.graph_objects as go
+    fig = go.Figure()
+
+    # 4象限の背景色を追加
+    mid_x, mid_y = 3, 3  # 中央値
+
+    # 象限の背景色（拡大版 - 文字の視認性向上）
+    fig.add_shape(
+        type="rect", x0=0.5, y0=mid_y, x1=mid_x, y1=5.5,
+        fillcolor="rgba(245, 101, 101, 0.15)", line=dict(width=0),
+        name="優先改善課題（低満足・高期待）"
+    )
+    fig.add_shape(
+        type="rect", x0=mid_x, y0=mid_y, x1=5.5, y1=5.5,
+        fillcolor="rgba(72, 187, 120, 0.15)", line=dict(width=0),
+        name="強み（高満足・高期待）"
+    )
+    fig.add_shape(
+        type="rect", x0=0.5, y0=0.5, x1=mid_x, y1=mid_y,
+        fillcolor="rgba(237, 137, 54, 0.15)", line=dict(width=0),
+        name="弱み（低満足・低期待）"
+    )
+    fig.add_shape(
+        type="rect", x0=mid_x, y0=0.5, x1=5.5, y1=mid_y,
+        fillcolor="rgba(159, 122, 234, 0.15)", line=dict(width=0),
+        name="現状維持項目（高満足・低期待）"
+    )
+
+    # 区切り線を追加
+    fig.add_hline(y=mid_y, line_dash="dash", line_color="rgba(128, 128, 128, 0.8)", line_width=2)
+    fig.add_vline(x=mid_x, line_dash="dash", line_color="rgba(128, 128, 128, 0.8)", line_width=2)
+
+    # データポイントを追加（テキスト重なり回避版）
+    # 象限の判定・色・ラベル位置は配列演算でまとめて決定する
+    sat_values = np.asarray(satisfaction_tuple, dtype=float)
+    exp_values = np.asarray(expectation_tuple, dtype=float)
+    quadrant_idx = _classify_quadrants(sat_values, exp_values, mid_x, mid_y)
+    quadrants = _QUADRANT_LABELS[quadrant_idx]
+    colors = _QUADRANT_COLORS[quadrant_idx]
+    # 象限ごとの候補位置をインデックス順に循環選択
+    text_positions = _QUADRANT_TEXT_POSITIONS[quadrant_idx, np.arange(len(categories_tuple)) % _QUADRANT_TEXT_POSITIONS.shape[1]]
+
+    # マーカーのみを表示（テキストは分離）
+    fig.add_trace(go.Scatter(
+        x=sat_values,
+        y=exp_values,
+        mode='markers',
+        marker=dict(
+            size=20,  # 統一サイズ
+            color=colors,
+            symbol='circle',  # すべて円形で統一
+            line=dict(width=2, color='white'),
+            opacity=0.9
+        ),
+        hovertemplate='<b>%{customdata[0]}</b><br>' +
+                    '満足度: %{x:.1f}<br>' +
+                    '期待度: %{y:.1f}<br>' +
+                    'ギャップ: %{customdata[1]:.2f}<br>' +
+                    '象限: %{customdata[2]}<extra></extra>',
+        customdata=list(zip(
+            categories_tuple,
+            gap_tuple,
+            quadrants
+        )),
+        showlegend=False,
+        name=""
+    ))
+
+    # テキストを個別に追加（重なり回避）
+    for i, (x, y, category) in enumerate(zip(sat_values, exp_values, categories_tuple)):
+        # テキストオフセットを計算（象限ラベルとの重なりを避ける）
+        offset_map = {
+            "top center": (0, 0.2),
+            "bottom center": (0, -0.2),
+            "middle left": (-0.3, 0),
+            "middle right": (0.3, 0),
+            "top left": (-0.25, 0.2),
+            "top right": (0.25, 0.2),
+            "bottom left": (-0.25, -0.2),
+            "bottom right": (0.25, -0.2)
+        }
+
+        text_pos = text_positions[i]
+        offset_x, offset_y = offset_map.get(text_pos, (0, 0.15))
+
+        fig.add_annotation(
+            x=x + offset_x,
+            y=y + offset_y,
+            text=f"<b>{category}</b>",
+            showarrow=True,
+            arrowhead=2,
+            arrowsize=1,
+            arrowwidth=1,
+            arrowcolor=colors[i],
+            ax=0,
+            ay=-15 if "top" in text_pos else 15 if "bottom" in text_pos else 0,
+            font=dict(size=9, color='#1f2937'),
+            bgcolor='rgba(255, 255, 255, 0.8)',
+            bordercolor=colors[i],
+            borderwidth=1
+        )
+
+    # レイアウト設定
+    fig.update_layout(
+        title={
+            'text': "期待度 vs 満足度 4象限分析",
+            'x': 0.5,
+            'font': {'size': 18, 'color': '#1f2937'}
+        },
+        xaxis=dict(
+            title="満足度 →",
+            range=[0.3, 5.7],
+            showgrid=True,
+            gridcolor='rgba(128, 128, 128, 0.2)',
+            dtick=1
+        ),
+        yaxis=dict(
+            title="↑ 期待度",
+            range=[0.3, 5.7],
+            showgrid=True,
+            gridcolor='rgba(128, 128, 128, 0.2)',
+            dtick=1
+        ),
+        height=650,
+        plot_bgcolor='white',
+        paper_bgcolor='white'
+    )
+
+    # 象限ラベルを追加（重なり回避のため外側に配置）
+    annotations = [
+        dict(x=4.8, y=4.8, text="<b>💪 強み</b><br>(高満足・高期待)", 
+             showarrow=False, font=dict(size=10, color='#22543d'), 
+             bgcolor='rgba(72, 187, 120, 0.2)', bordercolor='#48BB78',
+             xanchor='center', yanchor='middle'),
+        dict(x=1.2, y=4.8, text="<b>🔴 優先改善課題</b><br>(低満足・高期待)", 
+             showarrow=False, font=dict(size=10, color='#742a2a'), 
+             bgcolor='rgba(245, 101, 101, 0.2)', bordercolor='#F56565',
+             xanchor='center', yanchor='middle'),
+        dict(x=4.8, y=1.2, text="<b>✅ 現状維持項目</b><br>(高満足・低期待)", 
+             showarrow=False, font=dict(size=10, color='#553c9a'), 
+             bgcolor='rgba(159, 122, 234, 0.2)', bordercolor='#9F7AEA',
+             xanchor='center', yanchor='middle'),
+        dict(x=1.2, y=1.2, text="<b>⚫ 弱み</b><br>(低満足・低期待)", 
+             showarrow=False, font=dict(size=10, color='#9c4221'), 
+             bgcolor='rgba(237, 137, 54, 0.2)', bordercolor='#ED8936',
+             xanchor='center', yanchor='middle')
+    ]
+
+    for ann in annotations:
+        fig.add_annotation(**ann)
+    return fig
+
+def _radar_tab(kpis):
+    """レーダーチャートタブを描画"""
+    col1, col2 = st.columns(2)
+
+    categories = tuple(kpis['satisfaction_by_category'].keys())
+    satisfaction_values = _rounded(kpis['satisfaction_by_category'].values())
+
+    with col1:
+        # 満足度レーダーチャート
+        st.plotly_chart(_radar_satisfaction(categories, satisfaction_values), use_container_width=True)
+
+    with col2:
+        # 期待度レーダーチャート
+        if 'expectation_by_category' in kpis:
+            expectation_values = _rounded(kpis['expectation_by_category'].values())
+            st.plotly_chart(
+                _radar_satisfaction_vs_expectation(categories, satisfaction_values, expectation_values),
+                use_container_width=True
+            )
+
+def _ranking_tab(kpis):
+    """満足度ランキングタブを描画"""
+    # 満足度ランキング
+    categories = tuple(kpis['satisfaction_by_category'].keys())
+    satisfaction_values = _rounded(kpis['satisfaction_by_category'].values())
+    st.plotly_chart(_satisfaction_ranking_bar(categories, satisfaction_values), use_container_width=True)
+
+def _gap_tab(kpis):
+    """期待度ギャップ分析タブを描画"""
+    # 期待度ギャップ分析
+    satisfaction_values = list(kpis['satisfaction_by_category'].values())
+    if ('gap_by_category' in kpis and 
+        'expectation_by_category' in kpis and 
+        len(satisfaction_values) > 0):
+
+        try:
+            gap_df = pd.DataFrame({
+                'カテゴリ': list(kpis['gap_by_category'].keys()),
+                'ギャップ': list(kpis['gap_by_category'].values()),
+                '満足度': satisfaction_values,
+                '期待度': list(kpis['expectation_by_category'].values())
+            })
+
+            # データフレームが有効かチェック
+            if gap_df.empty or len(gap_df) == 0:
+                st.warning("期待度ギャップ分析用のデータが不足しています。")
+                return
+
+        except Exception as e:
+            st.error(f"データの準備中にエラーが発生しました: {str(e)}")
+            return
+
+        # 4象限プロット（大幅改善版）
+        # 象限の判定はテーブルの並び替えにも使う
+        mid_x, mid_y = 3, 3  # 中央値
+        sat_values = gap_df['満足度'].to_numpy()
+        exp_values = gap_df['期待度'].to_numpy()
+        quadrant_idx = _classify_quadrants(sat_values, exp_values, mid_x, mid_y)
+        quadrants = _QUADRANT_LABELS[quadrant_idx]
+
+        fig = _quadrant_scatter(
+            tuple(gap_df['カテゴリ']), tuple(sat_values), tuple(exp_values), tuple(gap_df['ギャップ'])
+        )
+
+        st.plotly_chart(fig, use_container_width=True)
+
+        # 象限別の説明
+        st.info("""
+        **📊 4象限の解釈**
+        - 💪 **強み（右上）**: 満足度・期待度ともに高い項目。競争優位性の源泉
+        - 🔴 **優先改善課題（左上）**: 期待は高いが満足度が低い項目。最優先で改善が必要
+        - ✅ **現状維持項目（右下）**: 満足度は高いが期待度が低い項目。現状の品質を維持
+        - ⚫ **弱み（左下）**: 期待・満足ともに低い項目。長期的な改善検討が必要
+        """)
+
+        # ギャップテーブル（改善版）
+        st.subheader("📋 象限別分析結果")
+
+        try:
+            # 表示用の列を配列から直接組み立て、優先度順に並べて表示（優先度カラムは除外）
+            gaps = gap_df['ギャップ'].to_numpy()
+            order = np.argsort(_QUADRANT_PRIORITY[quadrant_idx], kind='stable')
+            display_df = pd.DataFrame({
+                'カテゴリ': gap_df['カテゴリ'].to_numpy()[order],
+                '満足度': np.round(sat_values, 1)[order],
+                '期待度': np.round(exp_values, 1)[order],
+                'ギャップ': np.round(gaps, 2)[order],
+                '象限': quadrants[order],
+                'ギャップ評価': np.select(
+                    [gaps > 0.3, gaps < -0.3], ['😊 満足>期待', '😔 期待>満足'], default='😐 ほぼ同等'
+                )[order],
+            })
+
+            st.dataframe(
+                display_df,
+                use_container_width=True,
+                hide_index=True
+            )
+
+        except Exception as e:
+            st.error(f"テーブル表示中にエラーが発生しました: {str(e)}")
+            st.info("基本的な満足度・期待度データは利用可能です。詳細な分析表示のみエラーが発生しています。")
+
+    else:
+        st.warning("期待度ギャップ分析に必要なデータが不足しています。満足度データまたは期待度データが利用できません。")
+
 def show_satisfaction_analysis(data, kpis):
     """満足度分析を表示"""
     st.header("📈 満足度・期待度分析")
@@ -908,379 +1318,18 @@ def show_satisfaction_analysis(data, kpis):
     tab1, tab2, tab3 = st.tabs(["📊 レーダーチャート", "📋 満足度ランキング", "🎯 期待度ギャップ分析"])
     
     with tab1:
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # 満足度レーダーチャート
-            categories = list(kpis['satisfaction_by_category'].keys())
-            satisfaction_values = list(kpis['satisfaction_by_category'].values())
-            
-            fig = go.Figure()
-            fig.add_trace(go.Scatterpolar(
-                r=satisfaction_values,
-                theta=categories,
-                fill='toself',
-                name='満足度',
-                marker_color='rgba(46, 204, 113, 0.6)',
-                line=dict(color='rgba(46, 204, 113, 1)', width=3)
-            ))
-            
-            fig.update_layout(
-                polar=dict(
-                    radialaxis=dict(visible=True, range=[0, 5], tickfont=dict(size=10)),
-                    angularaxis=dict(tickfont=dict(size=9))
-                ),
-                showlegend=False,
-                title="満足度レーダーチャート",
-                height=400
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with col2:
-            # 期待度レーダーチャート
-            if 'expectation_by_category' in kpis:
-                expectation_values = list(kpis['expectation_by_category'].values())
-                
-                fig = go.Figure()
-                fig.add_trace(go.Scatterpolar(
-                    r=satisfaction_values,
-                    theta=categories,
-                    fill='toself',
-                    name='満足度',
-                    marker_color='rgba(46, 204, 113, 0.6)',
-                    line=dict(color='rgba(46, 204, 113, 1)', width=2)
-                ))
-                fig.add_trace(go.Scatterpolar(
-                    r=expectation_values,
-                    theta=categories,
-                    fill='toself',
-                    name='期待度',
-                    marker_color='rgba(52, 152, 219, 0.4)',
-                    line=dict(color='rgba(52, 152, 219, 1)', width=2)
-                ))
-                
-                fig.update_layout(
-                    polar=dict(
-                        radialaxis=dict(visible=True, range=[0, 5], tickfont=dict(size=10)),
-                        angularaxis=dict(tickfont=dict(size=9))
-                    ),
-                    title="満足度 vs 期待度",
-                    height=400
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
+        _radar_tab(kpis)
     
     with tab2:
-        # 満足度ランキング
-        categories = list(kpis['satisfaction_by_category'].keys())
-        satisfaction_values = list(kpis['satisfaction_by_category'].values())
-        
-        satisfaction_df = pd.DataFrame({
-            'カテゴリ': categories,
-            '満足度': satisfaction_values
-        }).sort_values('満足度', ascending=True)
-        
-        fig = px.bar(
-            satisfaction_df,
-            x='満足度',
-            y='カテゴリ',
-            orientation='h',
-            title="カテゴリ別満足度ランキング",
-            color='満足度',
-            color_continuous_scale='RdYlGn',
-            range_color=[1, 5],
-            height=600
-        )
-        
-        fig.update_layout(
-            xaxis_title="満足度 (1-5点)",
-            yaxis_title="",
-            coloraxis_colorbar=dict(title="満足度スコア")
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        _ranking_tab(kpis)
     
     with tab3:
-        # 期待度ギャップ分析
-        if ('gap_by_category' in kpis and 
-            'expectation_by_category' in kpis and 
-            len(satisfaction_values) > 0):
-            
-            try:
-                gap_df = pd.DataFrame({
-                    'カテゴリ': list(kpis['gap_by_category'].keys()),
-                    'ギャップ': list(kpis['gap_by_category'].values()),
-                    '満足度': satisfaction_values,
-                    '期待度': list(kpis['expectation_by_category'].values())
-                })
-                
-                # データフレームが有効かチェック
-                if gap_df.empty or len(gap_df) == 0:
-                    st.warning("期待度ギャップ分析用のデータが不足しています。")
-                    return
-                    
-            except Exception as e:
-                st.error(f"データの準備中にエラーが発生しました: {str(e)}")
-                return
-            
-            # 4象限プロット（大幅改善版）
-            fig = go.Figure()
-            
-            # 4象限の背景色を追加
-            mid_x, mid_y = 3, 3  # 中央値
-            
-            # 象限分類関数を事前定義
-            def classify_quadrant(row):
-                x, y = row['満足度'], row['期待度']
-                if x >= 3 and y >= 3:
-                    return '💪 強み'
-                elif x < 3 and y >= 3:
-                    return '🔴 優先改善課題'
-                elif x >= 3 and y < 3:
-                    return '✅ 現状維持項目'
-                else:
-                    return '⚫ 弱み'
-            
-            # 象限の背景色（拡大版 - 文字の視認性向上）
-            fig.add_shape(
-                type="rect", x0=0.5, y0=mid_y, x1=mid_x, y1=5.5,
-                fillcolor="rgba(245, 101, 101, 0.15)", line=dict(width=0),
-                name="優先改善課題（低満足・高期待）"
-            )
-            fig.add_shape(
-                type="rect", x0=mid_x, y0=mid_y, x1=5.5, y1=5.5,
-                fillcolor="rgba(72, 187, 120, 0.15)", line=dict(width=0),
-                name="強み（高満足・高期待）"
-            )
-            fig.add_shape(
-                type="rect", x0=0.5, y0=0.5, x1=mid_x, y1=mid_y,
-                fillcolor="rgba(237, 137, 54, 0.15)", line=dict(width=0),
-                name="弱み（低満足・低期待）"
-            )
-            fig.add_shape(
-                type="rect", x0=mid_x, y0=0.5, x1=5.5, y1=mid_y,
-                fillcolor="rgba(159, 122, 234, 0.15)", line=dict(width=0),
-                name="現状維持項目（高満足・低期待）"
-            )
-            
-            # 区切り線を追加
-            fig.add_hline(y=mid_y, line_dash="dash", line_color="rgba(128, 128, 128, 0.8)", line_width=2)
-            fig.add_vline(x=mid_x, line_dash="dash", line_color="rgba(128, 128, 128, 0.8)", line_width=2)
-            
-            # データポイントを追加（テキスト重なり回避版）
-            colors = []
-            sizes = []
-            symbols = []
-            text_positions = []
-            
-            # テキスト位置を動的に決定する関数
-            def get_optimal_text_position(x, y, index, total_points):
-                positions = [
-                    "top center", "bottom center", "middle left", "middle right",
-                    "top left", "top right", "bottom left", "bottom right"
-                ]
-                
-                # 象限ベースの基本位置を決定
-                if x >= mid_x and y >= mid_y:  # 強み
-                    base_pos = ["top center", "top right", "middle right"]
-                elif x < mid_x and y >= mid_y:  # 優先改善課題
-                    base_pos = ["top center", "top left", "middle left"]
-                elif x >= mid_x and y < mid_y:  # 現状維持項目
-                    base_pos = ["bottom center", "bottom right", "middle right"]
-                else:  # 弱み
-                    base_pos = ["bottom center", "bottom left", "middle left"]
-                
-                # インデックスに基づいて位置を循環選択
-                return base_pos[index % len(base_pos)]
-            
-            for i, (_, row) in enumerate(gap_df.iterrows()):
-                x, y = row['満足度'], row['期待度']
-                gap = row['ギャップ']
-                
-                # 象限によって色を決定（すべて円形で統一）
-                if x >= mid_x and y >= mid_y:
-                    colors.append('#48BB78')  # 緑 - 強み
-                    symbols.append('circle')
-                elif x < mid_x and y >= mid_y:
-                    colors.append('#F56565')  # 赤 - 優先改善課題
-                    symbols.append('circle')
-                elif x >= mid_x and y < mid_y:
-                    colors.append('#9F7AEA')  # 紫 - 現状維持項目
-                    symbols.append('circle')
-                else:
-                    colors.append('#ED8936')  # オレンジ - 弱み
-                    symbols.append('circle')
-                
-                sizes.append(20)  # 統一サイズ
-                text_positions.append(get_optimal_text_position(x, y, i, len(gap_df)))
-            
-            # マーカーのみを表示（テキストは分離）
-            fig.add_trace(go.Scatter(
-                x=gap_df['満足度'],
-                y=gap_df['期待度'],
-                mode='markers',
-                marker=dict(
-                    size=sizes,
-                    color=colors,
-                    symbol=symbols,
-                    line=dict(width=2, color='white'),
-                    opacity=0.9
-                ),
-                hovertemplate='<b>%{customdata[0]}</b><br>' +
-                            '満足度: %{x:.1f}<br>' +
-                            '期待度: %{y:.1f}<br>' +
-                            'ギャップ: %{customdata[1]:.2f}<br>' +
-                            '象限: %{customdata[2]}<extra></extra>',
-                customdata=list(zip(
-                    gap_df['カテゴリ'], 
-                    gap_df['ギャップ'],
-                    [classify_quadrant(row) for _, row in gap_df.iterrows()]
-                )),
-                showlegend=False,
-                name=""
-            ))
-            
-            # テキストを個別に追加（重なり回避）
-            for i, (_, row) in enumerate(gap_df.iterrows()):
-                x, y = row['満足度'], row['期待度']
-                category = row['カテゴリ']
-                
-                # テキストオフセットを計算（象限ラベルとの重なりを避ける）
-                offset_map = {
-                    "top center": (0, 0.2),
-                    "bottom center": (0, -0.2),
-                    "middle left": (-0.3, 0),
-                    "middle right": (0.3, 0),
-                    "top left": (-0.25, 0.2),
-                    "top right": (0.25, 0.2),
-                    "bottom left": (-0.25, -0.2),
-                    "bottom right": (0.25, -0.2)
-                }
-                
-                text_pos = text_positions[i]
-                offset_x, offset_y = offset_map.get(text_pos, (0, 0.15))
-                
-                fig.add_annotation(
-                    x=x + offset_x,
-                    y=y + offset_y,
-                    text=f"<b>{category}</b>",
-                    showarrow=True,
-                    arrowhead=2,
-                    arrowsize=1,
-                    arrowwidth=1,
-                    arrowcolor=colors[i],
-                    ax=0,
-                    ay=-15 if "top" in text_pos else 15 if "bottom" in text_pos else 0,
-                    font=dict(size=9, color='#1f2937'),
-                    bgcolor='rgba(255, 255, 255, 0.8)',
-                    bordercolor=colors[i],
-                    borderwidth=1
-                )
-            
-            # レイアウト設定
-            fig.update_layout(
-                title={
-                    'text': "期待度 vs 満足度 4象限分析",
-                    'x': 0.5,
-                    'font': {'size': 18, 'color': '#1f2937'}
-                },
-                xaxis=dict(
-                    title="満足度 →",
-                    range=[0.3, 5.7],
-                    showgrid=True,
-                    gridcolor='rgba(128, 128, 128, 0.2)',
-                    dtick=1
-                ),
-                yaxis=dict(
-                    title="↑ 期待度",
-                    range=[0.3, 5.7],
-                    showgrid=True,
-                    gridcolor='rgba(128, 128, 128, 0.2)',
-                    dtick=1
-                ),
-                height=650,
-                plot_bgcolor='white',
-                paper_bgcolor='white'
-            )
-            
-            # 象限ラベルを追加（重なり回避のため外側に配置）
-            annotations = [
-                dict(x=4.8, y=4.8, text="<b>💪 強み</b><br>(高満足・高期待)", 
-                     showarrow=False, font=dict(size=10, color='#22543d'), 
-                     bgcolor='rgba(72, 187, 120, 0.2)', bordercolor='#48BB78',
-                     xanchor='center', yanchor='middle'),
-                dict(x=1.2, y=4.8, text="<b>🔴 優先改善課題</b><br>(低満足・高期待)", 
-                     showarrow=False, font=dict(size=10, color='#742a2a'), 
-                     bgcolor='rgba(245, 101, 101, 0.2)', bordercolor='#F56565',
-                     xanchor='center', yanchor='middle'),
-                dict(x=4.8, y=1.2, text="<b>✅ 現状維持項目</b><br>(高満足・低期待)", 
-                     showarrow=False, font=dict(size=10, color='#553c9a'), 
-                     bgcolor='rgba(159, 122, 234, 0.2)', bordercolor='#9F7AEA',
-                     xanchor='center', yanchor='middle'),
-                dict(x=1.2, y=1.2, text="<b>⚫ 弱み</b><br>(低満足・低期待)", 
-                     showarrow=False, font=dict(size=10, color='#9c4221'), 
-                     bgcolor='rgba(237, 137, 54, 0.2)', bordercolor='#ED8936',
-                     xanchor='center', yanchor='middle')
-            ]
-            
-            for ann in annotations:
-                fig.add_annotation(**ann)
-            
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # 象限別の説明
-            st.info("""
-            **📊 4象限の解釈**
-            - 💪 **強み（右上）**: 満足度・期待度ともに高い項目。競争優位性の源泉
-            - 🔴 **優先改善課題（左上）**: 期待は高いが満足度が低い項目。最優先で改善が必要
-            - ✅ **現状維持項目（右下）**: 満足度は高いが期待度が低い項目。現状の品質を維持
-            - ⚫ **弱み（左下）**: 期待・満足ともに低い項目。長期的な改善検討が必要
-            """)
-            
-            # ギャップテーブル（改善版）
-            st.subheader("📋 象限別分析結果")
-            
-            try:
-                gap_display = gap_df.copy()
-                gap_display['象限'] = gap_display.apply(classify_quadrant, axis=1)
-                gap_display['ギャップ評価'] = gap_display['ギャップ'].apply(
-                    lambda x: '😊 満足>期待' if x > 0.3 else '😔 期待>満足' if x < -0.3 else '😐 ほぼ同等'
-                )
-                
-                # 優先度を設定
-                priority_map = {'🔴 優先改善課題': 1, '⚫ 弱み': 2, '✅ 現状維持項目': 3, '💪 強み': 4}
-                gap_display['優先度'] = gap_display['象限'].map(priority_map)
-                
-                # NaNの処理
-                gap_display['優先度'] = gap_display['優先度'].fillna(5)
-                
-                # 必要なカラムが存在するかチェック
-                required_columns = ['カテゴリ', '満足度', '期待度', 'ギャップ', '象限', 'ギャップ評価', '優先度']
-                if all(col in gap_display.columns for col in required_columns):
-                    # 表示用に整理
-                    display_df = gap_display[required_columns].sort_values('優先度')
-                    display_df = display_df.round({'満足度': 1, '期待度': 1, 'ギャップ': 2})
-                    display_df = display_df.drop_duplicates().reset_index(drop=True)
-                    
-                    # 優先度カラムを除外して表示
-                    st.dataframe(
-                        display_df[['カテゴリ', '満足度', '期待度', 'ギャップ', '象限', 'ギャップ評価']], 
-                        use_container_width=True,
-                        hide_index=True
-                    )
-                else:
-                    st.error("必要なデータカラムが不足しています。")
-                    
-            except Exception as e:
-                st.error(f"テーブル表示中にエラーが発生しました: {str(e)}")
-                st.info("基本的な満足度・期待度データは利用可能です。詳細な分析表示のみエラーが発生しています。")
-                
-        else:
-            st.warning("期待度ギャップ分析に必要なデータが不足しています。満足度データまたは期待度データが利用できません。")
+        _gap_tab(kpis)
 
 def show_text_mining_analysis():
     """テキストマイニング分析を表示"""
+    import plotly.express as px
+    import plotly.graph_objects as go
     st.header("📝 テキストマイニング分析")
     
     # コメントデータの読み込み
@@ -1583,6 +1632,8 @@ def show_text_mining_analysis():
 
 def show_time_series_analysis():
     """KPI時系列分析を表示"""
+    import plotly.express as px
+    import plotly.graph_objects as go
     st.header("📈 KPI時系列分析")
     
     # データの読み込み
@@ -1838,8 +1889,68 @@ def create_dummy_monthly_kpi_data():
     
     return pd.DataFrame(monthly_data)
 
+@timed_cache(show_spinner=False)
+def compute_dept_stats(data_id, _df):
+    """部署別の平均スコアと回答者数を集計（キャッシュキーはdata_idのみで、_dfはハッシュしない）"""
+    df = _df
+    mean_cols = ['overall_satisfaction', 'nps_score', 'contribution_score', 'long_term_intention',
+                 'annual_salary', 'monthly_overtime']
+    
+    dept = df['department']
+    if not isinstance(dept.dtype, pd.CategoricalDtype):
+        dept = dept.astype('category')
+    
+    if POLARS_AVAILABLE:
+        # polarsが利用可能な場合は部署ごとの平均・件数をpolarsのgroup_byで一括集計
+        grouped = (
+            pl.from_pandas(df[mean_cols].assign(department=dept.astype(object)))
+            .drop_nulls('department')
+            .group_by('department')
+            .agg([pl.col(col).cast(pl.Float64).mean() for col in mean_cols]
+                 + [pl.len().cast(pl.Int64).alias('response_id')])
+            .to_pandas()
+            .set_index('department')
+        )
+        # 部署の並び順はカテゴリの順序に揃える
+        order = [c for c in dept.cat.categories if c in grouped.index]
+        dept_stats = grouped.loc[order]
+    else:
+        # 部署のカテゴリコードごとにbincountで件数・合計を求め、回答のある部署のみ平均を算出
+        codes = dept.cat.codes.to_numpy()
+        valid = codes >= 0
+        codes = codes[valid]
+        n_depts = len(dept.cat.categories)
+        counts = np.bincount(codes, minlength=n_depts)
+        observed = counts > 0
+        
+        dept_stats = pd.DataFrame(
+            {
+                col: np.bincount(codes, weights=df[col].to_numpy(dtype=np.float64)[valid],
+                                 minlength=n_depts)[observed] / counts[observed]
+                for col in mean_cols
+            },
+            index=pd.Index(dept.cat.categories[observed], name='department')
+        )
+        dept_stats['response_id'] = counts[observed]
+    dept_stats = dept_stats.round(2)
+    
+    dept_stats.columns = ['総合満足度', 'NPS', '活躍貢献度', '勤続意向', '平均年収', '平均残業時間', '回答者数']
+    return dept_stats
+
+@st.cache_data(show_spinner=False)
+def _project_display(data_id, _df, cols_tuple):
+    """表示用に存在する列だけを抜き出す（キャッシュキーはdata_idと列名で、_dfはハッシュしない）"""
+    return _df[pd.Index(cols_tuple).intersection(_df.columns, sort=False)]
+
+@st.cache_resource(max_entries=16)
+def _to_arrow(key, _df):
+    """表示用DataFrameをArrowテーブルに変換して保持（キャッシュキーはkeyのみで、_dfはハッシュしない）"""
+    import pyarrow as pa
+    return pa.Table.from_pandas(_df)
+
 def show_department_analysis(data, kpis):
     """部署別分析を表示"""
+    import plotly.express as px
     st.header("🏢 部署別・詳細分析")
     
     if 'employee_data' not in data:
@@ -1854,17 +1965,7 @@ def show_department_analysis(data, kpis):
     with tabs[0]:  # 部署別分析タブ
         # 部署別統計
         if 'department' in df.columns:
-            dept_stats = df.groupby('department').agg({
-                'overall_satisfaction': 'mean',
-                'nps_score': 'mean',
-                'contribution_score': 'mean',
-                'long_term_intention': 'mean',
-                'annual_salary': 'mean',
-                'monthly_overtime': 'mean',
-                'response_id': 'count'
-            }).round(2)
-            
-            dept_stats.columns = ['総合満足度', 'NPS', '活躍貢献度', '勤続意向', '平均年収', '平均残業時間', '回答者数']
+            dept_stats = compute_dept_stats(data.get('data_id'), df)
             
             # 部署別満足度比較
             fig = px.bar(
@@ -1882,23 +1983,29 @@ def show_department_analysis(data, kpis):
             
             # 詳細データテーブル
             st.subheader("部署別詳細データ")
-            st.dataframe(dept_stats, use_container_width=True)
+            st.dataframe(_to_arrow((data.get('data_id'), 'dept_stats'), dept_stats),
+                         use_container_width=True, key="dept_stats_table")
         else:
             st.info("部署情報が含まれていないため、個別回答者の詳細データを表示します")
             
             # 個別データの表示
-            display_cols = ['response_id', 'overall_satisfaction', 'nps_score', 'contribution_score', 
-                           'annual_salary', 'monthly_overtime', 'paid_leave_rate']
-            available_cols = [col for col in display_cols if col in df.columns]
+            display_df = _project_display(data.get('data_id'), df, DISPLAY_COLS)
             
-            if available_cols:
-                st.dataframe(df[available_cols], use_container_width=True)
+            if len(display_df.columns) > 0:
+                if AGGRID_AVAILABLE:
+                    # 再実行時にブラウザ側の行データを使い回すため、更新なし・固定キーで表示
+                    AgGrid(display_df, update_mode=GridUpdateMode.NO_UPDATE, key="indiv_table",
+                           enable_enterprise_modules=False)
+                else:
+                    st.dataframe(_to_arrow((data.get('data_id'), 'display'), display_df),
+                                 use_container_width=True)
     
     with tabs[1]:  # 強み・弱み分析タブ
         show_strengths_weaknesses_analysis(data, kpis)
 
 def show_strengths_weaknesses_analysis(data, kpis):
     """強み・弱み分析を表示"""
+    import plotly.express as px
     st.subheader("💪 組織の強み・弱み分析")
     
     if 'satisfaction_by_category' not in kpis or not kpis['satisfaction_by_category']:
@@ -2037,7 +2144,8 @@ def apply_filters(data, filters):
     if not data or 'employee_data' not in data:
         return data
     
-    df = data['employee_data'].copy()
+    # 絞り込みは新しいDataFrameを返し、元データは変更しないため事前のコピーは不要
+    df = data['employee_data']
     
     # 各フィルターを適用
     if filters['group'] and 'group' in df.columns:
@@ -2061,40 +2169,78 @@ def apply_filters(data, filters):
     if filters['age_group'] and 'age_group' in df.columns:
         df = df[df['age_group'].isin(filters['age_group'])]
     
-    # フィルター後のデータを返す
+    # フィルター後のデータを返す（data_idは元データとフィルター条件から決まる）
     filtered_data = data.copy()
     filtered_data['employee_data'] = df
+    active_filters = tuple(sorted((key, tuple(values)) for key, values in filters.items() if values))
+    base_id = data.get('data_id') or _frame_fingerprint(data['employee_data'])
+    filter_id = hashlib.md5(repr(active_filters).encode()).hexdigest()[:8]
+    filtered_data['data_id'] = f"{base_id}:{filter_id}"
     
     return filtered_data
 
+def get_session_data():
+    """読み込み済みのデータをセッションから返す（data_versionが更新された場合のみ再読み込み）"""
+    state = st.session_state
+    if 'data_version' not in state:
+        state.data_version = 0
+    if 'cached_data' not in state or state.get('cached_version') != state.data_version:
+        state.cached_data = load_employee_data()
+        state.cached_version = state.data_version
+    return state.cached_data
+
+def _refresh_data():
+    """データ更新ボタンのコールバック（次の実行でデータを再読み込みさせる）"""
+    # ファイル読み込みのキャッシュのみ破棄（KPI等はdata_idで判定されるため内容が同じなら再利用される）
+    load_employee_data.clear()
+    st.session_state.data_version = st.session_state.get('data_version', 0) + 1
+
+def _show_cache_stats():
+    """timed_cacheで記録したキャッシュのヒット/ミス回数をサイドバーのデバッグ欄に表示"""
+    stats = st.session_state.get('_cache_stats')
+    if not stats:
+        return
+    with st.sidebar.expander("🛠️ キャッシュ統計", expanded=False):
+        st.dataframe(pd.DataFrame.from_dict(stats, orient='index'), use_container_width=True)
+
+# 調査データ（フィルター適用後のデータとKPI）を表示に使うページ
+_DATA_PAGES = frozenset({"📊 KPI概要", "📈 満足度分析", "🏢 詳細分析", "🔬 重回帰分析"})
+
+@st.fragment
+def _export_fragment():
+    """データエクスポート欄を描画（ボタン操作ではこの欄のみ再実行する）"""
+    st.subheader("📥 データエクスポート")
+    if st.button("📊 レポート出力", use_container_width=True):
+        st.success("実装時には分析レポートをPDF/Excelで出力できます")
+
+# サイドバーのヘッダー（ロゴ・タイトル・区切り線を1回のmarkdownで送信する）
+SIDEBAR_HEADER_HTML = """
+<div class="sidebar-header">
+    <div class="sidebar-logo">
+        <span style='color: #667eea; font-size: 24px;'>👥</span>
+    </div>
+    <div style='color: white; font-weight: bold; font-size: 18px;'>従業員調査分析</div>
+</div>
+<hr/>
+"""
+
 def main():
     # サイドバー
     with st.sidebar:
-        st.markdown("""
-        <div class="sidebar-header">
-            <div class="sidebar-logo">
-                <span style='color: #667eea; font-size: 24px;'>👥</span>
-            </div>
-            <div style='color: white; font-weight: bold; font-size: 18px;'>従業員調査分析</div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.divider()
+        st.markdown(SIDEBAR_HEADER_HTML, unsafe_allow_html=True)
         
         # ページ選択
         page = st.radio(
             "📋 分析ページ選択",
-            ["📊 KPI概要", "📈 満足度分析", "🏢 詳細分析", "📝 テキストマイニング", "⏰ 時系列分析", "🔬 重回帰分析", "🤖 AI テキスト分析"],
+            list(PAGES),
             index=0
         )
         
-        st.divider()
-        
-        # フィルター設定
-        st.markdown("### 🔍 データフィルター")
+        # フィルター設定（区切り線と見出しは1つのmarkdownで送信）
+        st.markdown("---\n### 🔍 データフィルター")
         
         # データを読み込んでフィルター選択肢を作成
-        temp_data = load_employee_data()
+        temp_data = get_session_data()
         
         filters = {}
         
@@ -2195,57 +2341,44 @@ def main():
         
         st.divider()
         
-        # データ更新ボタン
-        if st.button("🔄 データ更新", use_container_width=True):
-            st.cache_data.clear()
-            st.rerun()
+        # データ更新ボタン（コールバックで破棄するため、クリック時の再実行は1回で済む）
+        st.button("🔄 データ更新", use_container_width=True, on_click=_refresh_data)
         
         st.info("💡 Excelファイル更新後は「データ更新」ボタンを押してください")
         
-        st.divider()
-        
-        # レポート情報
-        st.markdown("### 📋 レポート情報")
-        
-        st.write(f"🕐 **最終更新:** {datetime.now().strftime('%Y/%m/%d')}")
+        # レポート情報（区切り線・見出し・更新日を1つのmarkdownで送信）
+        st.markdown(
+            f"---\n### 📋 レポート情報\n\n🕐 **最終更新:** {datetime.now().strftime('%Y/%m/%d')}"
+        )
         
         # データエクスポート
-        st.subheader("📥 データエクスポート")
-        if st.button("📊 レポート出力", use_container_width=True):
-            st.success("実装時には分析レポートをPDF/Excelで出力できます")
+        _export_fragment()
     
     # メインコンテンツ
     st.title("👥 従業員調査可視化ダッシュボード")
     st.markdown("---")
     
-    # データ読み込み
-    with st.spinner("📊 データを読み込み中..."):
-        data = load_employee_data()
-        # フィルターを適用
-        filtered_data = apply_filters(data, filters)
-        kpis = calculate_kpis(filtered_data)
+    # データ読み込み（調査データを使うページでのみフィルター適用・KPI計算を行う）
+    if page in _DATA_PAGES:
+        with st.spinner("📊 データを読み込み中..."):
+            data = get_session_data()
+            # フィルターを適用
+            filtered_data = apply_filters(data, filters)
+            kpis = calculate_kpis(filtered_data.get('data_id'), filtered_data.get('employee_data'))
     
     # ページ表示
-    if page == "📊 KPI概要":
-        show_kpi_overview(filtered_data, kpis)
-    elif page == "📈 満足度分析":
-        show_satisfaction_analysis(filtered_data, kpis)
-    elif page == "🏢 詳細分析":
-        show_department_analysis(filtered_data, kpis)
-    elif page == "📝 テキストマイニング":
-        show_text_mining_analysis()
-    elif page == "⏰ 時系列分析":
-        show_time_series_analysis()
-    elif page == "🔬 重回帰分析":
-        show_regression_analysis(filtered_data, kpis)
-    
-    elif page == "🤖 AI テキスト分析":
-        # 新しいAIテキスト分析機能を表示
-        from text_analysis_ml import show_text_analysis_ml_page
-        show_text_analysis_ml_page()
+    if page in _DATA_PAGES:
+        PAGES[page](filtered_data, kpis)
+    else:
+        PAGES[page]()
+    
+    # キャッシュ統計（ページ描画後に集計した値をサイドバーに表示）
+    _show_cache_stats()
 
 def show_regression_analysis(data, kpis):
     """重回帰分析を表示"""
+    import plotly.express as px
+    import plotly.graph_objects as go
     st.header("🔬 重回帰分析")
     st.markdown("主要指標に対する満足度項目の影響力を分析します")
     
@@ -2314,10 +2447,7 @@ def show_regression_analysis(data, kpis):
     target_col = target_options[selected_target]
     
     # 満足度項目（説明変数）を定義
-    satisfaction_categories = [
-        '勤務時間', '休日休暇', '有給休暇', '勤務体系', '昇給昇格', '人間関係',
-        '働く環境', '成長実感', '将来キャリア', '福利厚生', '評価制度'
-    ]
+    satisfaction_categories = SURVEY_CATEGORIES
     
     # デバッグ情報：利用可能な列名を表示
     with st.expander("🔍 デバッグ情報（利用可能な列名）"):
@@ -2341,12 +2471,8 @@ def show_regression_analysis(data, kpis):
             # "7 (Passive)" のような文字列から数値を抽出
             y = y.astype(str).str.extract(r'(\d+)', expand=False).astype(float)
         else:
-            # その他の場合は数値変換を試行
-            try:
-                y = pd.to_numeric(y, errors='coerce')
-            except:
-                st.error(f"目的変数 '{target_col}' を数値に変換できません")
-                return
+            # その他の場合は数値変換（変換できない値はNaN）
+            y = pd.to_numeric(y, errors='coerce')
         
         # 説明変数の準備（満足度項目）
         X_data = []
@@ -2374,15 +2500,12 @@ def show_regression_analysis(data, kpis):
             if any(pattern in col for pattern in satisfaction_patterns) and col not in available_features:
                 # 目的変数と同じ列は除外
                 if col != target_col:
-                    try:
-                        # 数値データに変換を試行
-                        numeric_data = pd.to_numeric(df[col], errors='coerce')
-                        # 欠損値が80%未満の場合のみ採用
-                        if numeric_data.notna().sum() / len(numeric_data) > 0.2:
-                            X_data.append(numeric_data)
-                            available_features.append(col)
-                    except:
-                        pass
+                    # 数値データに変換（変換できない値はNaN）
+                    numeric_data = pd.to_numeric(df[col], errors='coerce')
+                    # 欠損値が80%未満の場合のみ採用
+                    if numeric_data.notna().sum() / len(numeric_data) > 0.2:
+                        X_data.append(numeric_data)
+                        available_features.append(col)
         
         if not X_data:
             st.error("説明変数となる満足度データが見つかりません")
@@ -2633,11 +2756,11 @@ def show_regression_analysis(data, kpis):
             ))
             
             # 信頼区間
-            for idx, row in plot_data.iterrows():
-                if not pd.isna(row['95%信頼区間下限']) and not pd.isna(row['95%信頼区間上限']):
+            for variable, lower, upper in zip(plot_data['説明変数'], plot_data['95%信頼区間下限'], plot_data['95%信頼区間上限']):
+                if not pd.isna(lower) and not pd.isna(upper):
                     fig_ci.add_trace(go.Scatter(
-                        x=[row['95%信頼区間下限'], row['95%信頼区間上限']],
-                        y=[row['説明変数'], row['説明変数']],
+                        x=[lower, upper],
+                        y=[variable, variable],
                         mode='lines',
                         line=dict(color='gray', width=2),
                         showlegend=False,
@@ -2679,7 +2802,8 @@ def show_regression_analysis(data, kpis):
                 x=y, 
                 y=y_pred,
                 title='実測値 vs 予測値',
-                labels={'x': f'実測値 ({selected_target})', 'y': f'予測値 ({selected_target})'}
+                labels={'x': f'実測値 ({selected_target})', 'y': f'予測値 ({selected_target})'},
+                render_mode=PLOTLY_RENDER
             )
             
             # 完全予測線を追加
@@ -2699,7 +2823,8 @@ def show_regression_analysis(data, kpis):
                 x=y_pred,
                 y=residuals,
                 title='残差プロット',
-                labels={'x': '予測値', 'y': '残差'}
+                labels={'x': '予測値', 'y': '残差'},
+                render_mode=PLOTLY_RENDER
             )
             fig_residual.add_hline(y=0, line_dash="dash", line_color="red")
             st.plotly_chart(fig_residual, use_container_width=True)
@@ -2820,10 +2945,11 @@ def show_regression_analysis(data, kpis):
                     cooks_d = np.zeros(len(residuals))  # Fallback to zeros
                 
                 fig_cook = px.scatter(
-                    x=range(len(cooks_d)),
+                    x=np.arange(len(cooks_d)),
                     y=cooks_d,
                     title="Cook距離（外れ値検出）",
-                    labels={'x': 'サンプル番号', 'y': 'Cook距離'}
+                    labels={'x': 'サンプル番号', 'y': 'Cook距離'},
+                    render_mode=PLOTLY_RENDER
                 )
                 
                 # Cook距離の閾値線
@@ -2832,7 +2958,7 @@ def show_regression_analysis(data, kpis):
                                  annotation_text=f"閾値={threshold:.3f}")
                 
                 fig_cook.update_layout(height=400)
-                st.plotly_chart(fig_cook, use_container_width=True)
+                st.plotly_chart(_resampled(fig_cook), use_container_width=True)
             
             # 実用的な解釈とアドバイス
             st.subheader("💡 分析結果の実用的解釈")
@@ -2872,5 +2998,22 @@ def show_regression_analysis(data, kpis):
         st.error(f"分析中にエラーが発生しました: {str(e)}")
         st.info("データの形式や内容を確認してください")
 
+def show_ai_text_analysis():
+    """AIテキスト分析を表示"""
+    # 新しいAIテキスト分析機能を表示
+    from text_analysis_ml import show_text_analysis_ml_page
+    show_text_analysis_ml_page()
+
+# ページ名と表示関数（_DATA_PAGESのページは (data, kpis) を受け取る）
+PAGES = {
+    "📊 KPI概要": show_kpi_overview,
+    "📈 満足度分析": show_satisfaction_analysis,
+    "🏢 詳細分析": show_department_analysis,
+    "📝 テキストマイニング": show_text_mining_analysis,
+    "⏰ 時系列分析": show_time_series_analysis,
+    "🔬 重回帰分析": show_regression_analysis,
+    "🤖 AI テキスト分析": show_ai_text_analysis,
+}
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
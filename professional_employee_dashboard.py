@@ -362,6 +362,63 @@ COLUMN_MAPPING = {
     '活躍貢献度：現在の会社や所属組織であなたはどの程度、活躍貢献できていると感じますか？': 'sense_of_contribution'
 }
 
+# 期待度・満足度項目の識別パターン（列名に対する正規表現, 出力列名の接頭辞）
+# 列ごとに上から順に照合し、最初に一致したものを採用する
+_ITEM_PATTERNS = tuple((re.compile(pattern), key) for pattern, key in {
+    '勤務時間': 'work_hours',
+    '休日休暇がちゃんと取れる': 'holidays',
+    '有給休暇がちゃんと取れる': 'paid_leave',
+    '柔軟な勤務体系': 'flex_work',
+    '自宅から適切な距離': 'commute',
+    '転勤体制': 'job_transfer',
+    '社内異動': 'internal_mobility',
+    '残業代': 'overtime_pay',
+    '仕事量': 'workload',
+    '身体的負荷': 'physical_load',
+    '精神的負荷': 'mental_load',
+    '福利厚生': 'benefits',
+    '正当に評価': 'fair_evaluation',
+    '昇給・昇格': 'promotion',
+    '目標やノルマ': 'achievable_goals',
+    '専門的なスキル': 'specialized_skills',
+    '汎用的なスキル': 'general_skills',
+    '教育体制': 'training',
+    'キャリアパス': 'career_path',
+    '将来.*マッチ': 'career_match',
+    'ロールモデル': 'role_models',
+    '誇り.*プライド': 'pride_in_work',
+    '社会.*貢献': 'social_contribution',
+    'やりがい': 'job_fulfillment',
+    '裁量': 'autonomy',
+    '成長実感': 'sense_of_growth',
+    '達成感': 'sense_of_achievement',
+    '大きな.*プロジェクト': 'impactful_work',
+    '強み.*活かす': 'use_of_strengths',
+    '人間関係': 'relationships',
+    'ハラスメント': 'harassment_free',
+    '社風.*文化': 'culture_fit',
+    '風通し': 'open_communication',
+    '相互.*学び': 'learning_culture',
+    '事業基盤': 'company_stability',
+    '経営戦略': 'management_strategy',
+    '競合優位性': 'competitive_edge',
+    'ブランド力': 'brand_power',
+    'ミッション.*バリュー': 'mission_vision_fit',
+    '法令遵守': 'compliance',
+    'オフィス環境': 'work_environment',
+    '女性.*働きやすい': 'women_support'
+}.items())
+
+def _match_item_key(col_str):
+    """列名に最初に一致した識別パターンの接頭辞を返す（一致しない場合はNone）"""
+    return next((key for regex, key in _ITEM_PATTERNS if regex.search(col_str)), None)
+
+def to_numeric_column(series):
+    """列を数値に一括変換（数値型以外の列はカンマ区切りを除去、変換できない値はNaN）"""
+    if not pd.api.types.is_numeric_dtype(series):
+        series = series.astype(str).str.replace(',', '', regex=False)
+    return pd.to_numeric(series, errors='coerce')
+
 @st.cache_data
 def load_real_excel_data():
     """新しいExcelファイル構造に対応したデータ読み込み"""
@@ -429,55 +486,8 @@ def load_real_excel_data():
             numeric_columns = ['recommend_score', 'overall_satisfaction', 'long_term_intention', 'sense_of_contribution',
                              'start_year', 'annual_salary', 'avg_monthly_overtime', 'paid_leave_usage_rate']
             
-            for col in numeric_columns:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            # 期待度項目の識別パターン
-            expectation_patterns = {
-                '勤務時間': 'work_hours',
-                '休日休暇がちゃんと取れる': 'holidays',
-                '有給休暇がちゃんと取れる': 'paid_leave',
-                '柔軟な勤務体系': 'flex_work',
-                '自宅から適切な距離': 'commute',
-                '転勤体制': 'job_transfer',
-                '社内異動': 'internal_mobility',
-                '残業代': 'overtime_pay',
-                '仕事量': 'workload',
-                '身体的負荷': 'physical_load',
-                '精神的負荷': 'mental_load',
-                '福利厚生': 'benefits',
-                '正当に評価': 'fair_evaluation',
-                '昇給・昇格': 'promotion',
-                '目標やノルマ': 'achievable_goals',
-                '専門的なスキル': 'specialized_skills',
-                '汎用的なスキル': 'general_skills',
-                '教育体制': 'training',
-                'キャリアパス': 'career_path',
-                '将来.*マッチ': 'career_match',
-                'ロールモデル': 'role_models',
-                '誇り.*プライド': 'pride_in_work',
-                '社会.*貢献': 'social_contribution',
-                'やりがい': 'job_fulfillment',
-                '裁量': 'autonomy',
-                '成長実感': 'sense_of_growth',
-                '達成感': 'sense_of_achievement',
-                '大きな.*プロジェクト': 'impactful_work',
-                '強み.*活かす': 'use_of_strengths',
-                '人間関係': 'relationships',
-                'ハラスメント': 'harassment_free',
-                '社風.*文化': 'culture_fit',
-                '風通し': 'open_communication',
-                '相互.*学び': 'learning_culture',
-                '事業基盤': 'company_stability',
-                '経営戦略': 'management_strategy',
-                '競合優位性': 'competitive_edge',
-                'ブランド力': 'brand_power',
-                'ミッション.*バリュー': 'mission_vision_fit',
-                '法令遵守': 'compliance',
-                'オフィス環境': 'work_environment',
-                '女性.*働きやすい': 'women_support'
-            }
+            present_numeric = [col for col in numeric_columns if col in df.columns]
+            df[present_numeric] = df[present_numeric].apply(to_numeric_column)
             
             # 期待度・満足度データの処理
             expectation_columns = {}
@@ -488,26 +498,23 @@ def load_real_excel_data():
                 
                 # 期待度項目の識別
                 if '今の職場には期待' in col_str or '期待していない' in col_str:
-                    for pattern, key in expectation_patterns.items():
-                        if re.search(pattern, col_str):
-                            expectation_columns[col] = f'{key}_expectation'
-                            break
+                    key = _match_item_key(col_str)
+                    if key:
+                        expectation_columns[col] = f'{key}_expectation'
                 
                 # 満足度項目の識別  
                 elif '満足していない' in col_str or '満足している' in col_str:
-                    for pattern, key in expectation_patterns.items():
-                        if re.search(pattern, col_str):
-                            satisfaction_columns[col] = f'{key}_satisfaction'
-                            break
-            
-            # 期待度・満足度データの変換
-            for original_col, new_col in expectation_columns.items():
-                if original_col in df.columns:
-                    df[new_col] = pd.to_numeric(df[original_col], errors='coerce')
+                    key = _match_item_key(col_str)
+                    if key:
+                        satisfaction_columns[col] = f'{key}_satisfaction'
             
-            for original_col, new_col in satisfaction_columns.items():
-                if original_col in df.columns:
-                    df[new_col] = pd.to_numeric(df[original_col], errors='coerce')
+            # 期待度・満足度データの変換（変換後の列はまとめて一度に連結し、1列ずつの追加によるDataFrameの断片化を避ける）
+            converted = {
+                new_col: pd.to_numeric(df[original_col], errors='coerce')
+                for original_col, new_col in [*expectation_columns.items(), *satisfaction_columns.items()]
+            }
+            if converted:
+                df = pd.concat([df, pd.DataFrame(converted, index=df.index)], axis=1)
             
             print(f"処理後のデータ形状: {df.shape}")
             print(f"期待度項目数: {len(expectation_columns)}")
@@ -638,11 +645,13 @@ def calculate_professional_kpis(data, is_real_data):
     
     # NPS計算（1-5スケールを0-10に変換）
     if 'recommend_score' in data.columns and not data['recommend_score'].isna().all():
-        recommend_scaled = data['recommend_score'] * 2  # 1-5 → 2-10
-        promoters = len(recommend_scaled[recommend_scaled >= 9])
-        detractors = len(recommend_scaled[recommend_scaled <= 6])
-        nps = ((promoters - detractors) / len(data)) * 100
-        avg_recommend_score = data['recommend_score'].mean()
+        scores = data['recommend_score'].to_numpy(dtype=float)
+        recommend_scaled = scores * 2  # 1-5 → 2-10
+        n = scores.size
+        promoters = int(np.count_nonzero(recommend_scaled >= 9))
+        detractors = int(np.count_nonzero(recommend_scaled <= 6))
+        nps = ((promoters - detractors) / n) * 100 if n else 0.0
+        avg_recommend_score = np.nanmean(scores)
     else:
         nps = 0
         avg_recommend_score = 0